@@ -0,0 +1,167 @@
+# Host stand-in for the RP2040 `machine` module, installed by bench/run.py.
+# Hardware is modelled only as far as the shell needs: pins remember their
+# level, ADC channels return a ramp, PWM and Timer keep their settings, and
+# mem32 implements the SIO GPIO registers used by devman pin groups.
+
+GPIO_IN = 0xD0000004
+GPIO_OUT = 0xD0000010
+GPIO_OUT_SET = 0xD0000014
+GPIO_OUT_CLR = 0xD0000018
+GPIO_OUT_XOR = 0xD000001C
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=None, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self.level = 1 if pull == Pin.PULL_UP else 0
+        if value is not None:
+            self.level = 1 if value else 0
+        self.handler = None
+
+    def value(self, level=None):
+        if level is None:
+            return self.level
+        self.level = 1 if level else 0
+
+    def on(self):
+        self.level = 1
+
+    def off(self):
+        self.level = 0
+
+    def toggle(self):
+        self.level ^= 1
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        self.handler = handler
+
+    def __repr__(self):
+        return "Pin(GPIO%s)" % self.id
+
+
+class ADC:
+    CORE_TEMP = 4
+
+    def __init__(self, pin):
+        self.channel = pin.id if isinstance(pin, Pin) else pin
+        self.reading = 0
+
+    def read_u16(self):
+        if self.channel == 4:
+            # About 27 C on the internal temperature sensor
+            return 14022
+        self.reading = (self.reading + 977) & 0xFFFF
+        return self.reading
+
+    def __repr__(self):
+        return "ADC(%d)" % self.channel
+
+
+class PWM:
+    def __init__(self, pin, freq=1000, duty_u16=0):
+        self.pin = pin
+        self.frequency = freq
+        self.duty = duty_u16
+
+    def freq(self, value=None):
+        if value is None:
+            return self.frequency
+        self.frequency = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self.duty
+        self.duty = value
+
+    def deinit(self):
+        pass
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.callback = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, callback=None):
+        self.mode = mode
+        self.callback = callback
+
+    def fire(self):
+        """Run the callback once, as the hardware timer would."""
+        if self.callback is not None:
+            self.callback(self)
+
+    def deinit(self):
+        self.callback = None
+
+
+class Registers:
+    """Word-addressed memory holding the SIO GPIO registers.
+
+    GPIO_IN reads back the output register, as if every pin were looped
+    back to itself.
+    """
+
+    def __init__(self):
+        self.words = {}
+
+    def __getitem__(self, address):
+        if address == GPIO_IN:
+            address = GPIO_OUT
+        return self.words.get(address, 0)
+
+    def __setitem__(self, address, value):
+        out = self.words.get(GPIO_OUT, 0)
+        if address == GPIO_OUT_SET:
+            self.words[GPIO_OUT] = out | value
+        elif address == GPIO_OUT_CLR:
+            self.words[GPIO_OUT] = out & ~value
+        elif address == GPIO_OUT_XOR:
+            self.words[GPIO_OUT] = out ^ value
+        else:
+            self.words[address] = value & 0xFFFFFFFF
+
+
+mem32 = Registers()
+
+
+def freq(hz=None):
+    return 125000000
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+def soft_reset():
+    raise SystemExit("machine.soft_reset()")
+
+
+def unique_id():
+    return b"\xe6\x61\x38\x52\x83\x3a\x2b\x2c"
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state):
+    pass
+
+
+def idle():
+    pass
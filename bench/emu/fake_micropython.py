@@ -0,0 +1,36 @@
+# Host stand-in for the `micropython` module under CPython, installed by
+# bench/run.py. The code emitters are no-ops, so @native and @viper
+# functions run as ordinary Python (the harness also provides ptr8).
+
+
+def const(value):
+    return value
+
+
+def native(function):
+    return function
+
+
+def viper(function):
+    return function
+
+
+def schedule(function, argument):
+    function(argument)
+    return True
+
+
+def kbd_intr(char):
+    pass
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def mem_info(verbose=False):
+    pass
+
+
+def opt_level(level=None):
+    return 0
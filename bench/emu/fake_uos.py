@@ -0,0 +1,95 @@
+# Host stand-in for MicroPython's `uos`, installed by bench/run.py.
+# The device filesystem is emulated by a scratch directory on the host
+# (ideally on tmpfs): absolute paths are mapped below ROOT, so commands
+# that touch "/" never reach the host's real root. statvfs reports an
+# emulated flash of FLASH_BLOCKS blocks with usage taken from the files.
+import os
+
+ROOT = None
+BLOCK_SIZE = 4096
+FLASH_BLOCKS = 352
+sep = "/"
+
+
+def host_path(path):
+    if path.startswith("/"):
+        return ROOT + path
+    return path
+
+
+def mount(root):
+    """Make root the emulated filesystem and change into it."""
+    global ROOT
+    ROOT = root.rstrip("/")
+    os.chdir(ROOT)
+
+
+def getcwd():
+    cwd = os.getcwd()[len(ROOT):]
+    return cwd or "/"
+
+
+def chdir(path):
+    os.chdir(host_path(path))
+
+
+def listdir(path="."):
+    return os.listdir(host_path(path))
+
+
+def ilistdir(path="."):
+    if hasattr(os, "ilistdir"):
+        return os.ilistdir(host_path(path))
+    return scan_entries(os.scandir(host_path(path)))
+
+
+def scan_entries(entries):
+    for entry in entries:
+        if entry.is_dir():
+            yield (entry.name, 0x4000, 0, 0)
+        else:
+            yield (entry.name, 0x8000, 0, entry.stat().st_size)
+
+
+def stat(path):
+    return tuple(os.stat(host_path(path)))[:10]
+
+
+def used_blocks(path):
+    blocks = 0
+    for entry in ilistdir(path):
+        child = path + "/" + entry[0]
+        if entry[1] == 0x4000:
+            blocks += 1 + used_blocks(child)
+        else:
+            blocks += (stat(child)[6] + BLOCK_SIZE - 1) // BLOCK_SIZE
+    return blocks
+
+
+def statvfs(path):
+    free = max(FLASH_BLOCKS - used_blocks("/"), 0)
+    return (BLOCK_SIZE, BLOCK_SIZE, FLASH_BLOCKS, free, free, 0, 0, 0, 0, 255)
+
+
+def mkdir(path):
+    os.mkdir(host_path(path))
+
+
+def rmdir(path):
+    os.rmdir(host_path(path))
+
+
+def remove(path):
+    os.remove(host_path(path))
+
+
+def rename(old, new):
+    os.rename(host_path(old), host_path(new))
+
+
+def uname():
+    return ("rp2", "rp2", "1.23.0", "bench", "Raspberry Pi Pico with RP2040 (emulated)")
+
+
+def urandom(count):
+    return os.urandom(count)
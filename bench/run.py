@@ -0,0 +1,329 @@
+# Host-side benchmarks for Angusto.
+#
+# Runs shell commands against stand-in `machine`, `uos` and `micropython`
+# modules (bench/emu) so performance can be compared between commits
+# without a Pico. Works under CPython and the MicroPython unix port:
+#
+#     python bench/run.py [--runs N] [--only name,name] [--compare old.txt]
+#     micropython bench/run.py ...
+#
+# Each workload is set up once, then timed over --runs repetitions with the
+# console silenced. Memory is measured in one further run: the peak traced
+# by tracemalloc under CPython, or the bytes allocated with automatic
+# collection disabled under MicroPython. Output is one fixed-width line per
+# workload, so two result files can be diffed or passed to --compare.
+import sys
+import os
+import gc
+import time
+import builtins
+
+FORMAT_VERSION = 1
+CPYTHON = sys.implementation.name != "micropython"
+
+script = sys.argv[0]
+if not script.startswith("/"):
+    script = os.getcwd() + "/" + script
+BENCH_DIR = script.rsplit("/", 1)[0] if "/" in script else "."
+REPO_DIR = BENCH_DIR + "/.."
+
+real_print = builtins.print
+real_open = builtins.open
+real_sleep = time.sleep
+
+if CPYTHON:
+    import tracemalloc
+
+    # Heap size reported by gc.mem_free. CPython objects are several times
+    # larger than MicroPython's, so this is far above the Pico's ~200 KB to
+    # keep the shell's low-memory paths from firing on every command.
+    EMULATED_HEAP = 4 * 1024 * 1024
+
+
+def emulated_mem_alloc():
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+
+def install_stand_ins(root):
+    """Insert the emulated device modules and mount root as the filesystem."""
+    sys.path.insert(0, BENCH_DIR + "/emu")
+    sys.path.insert(1, REPO_DIR)
+    import fake_machine
+    import fake_uos
+    sys.modules["machine"] = fake_machine
+    sys.modules["uos"] = fake_uos
+    fake_uos.mount(root)
+
+    def device_open(path, *args, **kwargs):
+        return real_open(fake_uos.host_path(path) if isinstance(path, str) else path,
+                         *args, **kwargs)
+
+    builtins.open = device_open
+
+    if CPYTHON:
+        import fake_micropython
+        sys.modules["micropython"] = fake_micropython
+        builtins.ptr8 = lambda buffer: buffer
+        start = time.perf_counter()
+        time.ticks_ms = lambda: int((time.perf_counter() - start) * 1000) & 0x3FFFFFFF
+        time.ticks_us = lambda: int((time.perf_counter() - start) * 1000000) & 0x3FFFFFFF
+        time.ticks_add = lambda ticks, delta: (ticks + delta) & 0x3FFFFFFF
+        time.ticks_diff = lambda end, begin: ((end - begin + 0x20000000) & 0x3FFFFFFF) - 0x20000000
+        time.sleep_ms = lambda ms: real_sleep(ms / 1000)
+        time.sleep_us = lambda us: real_sleep(us / 1000000)
+        gc.mem_alloc = emulated_mem_alloc
+        gc.mem_free = lambda: EMULATED_HEAP - emulated_mem_alloc()
+
+
+def make_scratch_root():
+    if CPYTHON:
+        import tempfile
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        return tempfile.mkdtemp(prefix="angusto-bench-", dir=base)
+    root = "/tmp/angusto-bench"
+    try:
+        os.mkdir(root)
+    except OSError:
+        remove_host_tree(root, keep_top=True)
+    return root
+
+
+def remove_host_tree(path, keep_top=False):
+    for entry in os.ilistdir(path) if hasattr(os, "ilistdir") else \
+            [(name, 0x4000 if os.path.isdir(path + "/" + name) else 0x8000)
+             for name in os.listdir(path)]:
+        child = path + "/" + entry[0]
+        if entry[1] == 0x4000:
+            remove_host_tree(child)
+        else:
+            os.remove(child)
+    if not keep_top:
+        os.rmdir(path)
+
+
+def write_file(path, size, line=b"0123456789abcdef" * 4 + b"\n"):
+    with open(path, "wb") as file:
+        written = 0
+        while written + len(line) <= size:
+            file.write(line)
+            written += len(line)
+        file.write(line[:size - written])
+
+
+def quiet_print(*args, **kwargs):
+    pass
+
+
+# Workloads: each setup function prepares the emulated filesystem or device
+# registry and returns the function that is timed.
+
+def setup_ls_1k(long_format=False):
+    import uos
+    import cmd_fs
+    uos.mkdir("/bench_ls")
+    for index in range(1000):
+        with open("/bench_ls/file%04d.txt" % index, "wb") as file:
+            file.write(b"x" * (index % 64))
+    arguments = ["-l", "/bench_ls"] if long_format else ["/bench_ls"]
+    return lambda: cmd_fs.print_directory_contents(arguments)
+
+
+def setup_ls_l_1k():
+    import uos
+    try:
+        uos.stat("/bench_ls")
+    except OSError:
+        return setup_ls_1k(True)
+    import cmd_fs
+    return lambda: cmd_fs.print_directory_contents(["-l", "/bench_ls"])
+
+
+def setup_cp_1mb():
+    import cmd_fs
+    write_file("/bench_1mb.bin", 1024 * 1024)
+    return lambda: cmd_fs.copy_file(["/bench_1mb.bin", "/bench_1mb_copy.bin"])
+
+
+NOTEPAD_SCRIPT = ["list 2500", "2500 edited by the benchmark", "appended by the benchmark", "exit"]
+
+
+def setup_notepad_large():
+    import cmd_notepad
+    with open("/bench_notes.txt", "w") as file:
+        for index in range(5000):
+            file.write("line %d: the quick brown fox jumps over the lazy dog\n" % index)
+
+    def run():
+        answers = iter(NOTEPAD_SCRIPT)
+        builtins.input = lambda prompt="": next(answers)
+        cmd_notepad.notepad(["/bench_notes.txt"])
+
+    return run
+
+
+def setup_device_read_10k():
+    from shellenv import devman
+    devman.register_pin(26, "bench_pot", "adc")
+    devman.register_pin(15, "bench_in", "in")
+
+    def run():
+        for _ in range(5000):
+            devman.read_adc("bench_pot")
+            devman.read_pin("bench_in")
+
+    return run
+
+
+def setup_device_read_cmd_10k():
+    import cmd_device
+    from shellenv import devman
+    if "bench_pot" not in devman.adc_pins:
+        devman.register_pin(26, "bench_pot", "adc")
+
+    def run():
+        for line in cmd_device.iter_read(["bench_pot", "10000"]):
+            pass
+
+    return run
+
+
+async def exit_shell(prompt=""):
+    raise KeyboardInterrupt
+
+
+def setup_boot():
+    with open("/config.json", "w") as file:
+        # The key window is a fixed wait on the console, not work, so it is
+        # left out; bootinfo on a device shows what it adds
+        file.write('{"BOOT_DELAY": 3, "LED_PIN": 25, "MAIN_SCRIPT": "Angusto.py", '
+                   '"BOOT_KEY_WINDOW_MS": 0}')
+    with real_open(REPO_DIR + "/Angusto.py", "rb") as source, open("/Angusto.py", "wb") as copy:
+        copy.write(source.read())
+    repo_modules = [name[:-3] for name in os.listdir(REPO_DIR) if name.endswith(".py")]
+
+    def run():
+        # Cold start: drop every shell module so it is imported afresh
+        for name in repo_modules:
+            if name in sys.modules:
+                del sys.modules[name]
+        import lineedit
+        lineedit.read_line = exit_shell
+        time.sleep = quiet_print
+        try:
+            import main
+            main.main()
+        finally:
+            time.sleep = real_sleep
+
+    return run
+
+
+WORKLOADS = [
+    ("ls_1k", setup_ls_1k),
+    ("ls_l_1k", setup_ls_l_1k),
+    ("cp_1mb", setup_cp_1mb),
+    ("notepad_large", setup_notepad_large),
+    ("device_read_10k", setup_device_read_10k),
+    ("device_read_cmd_10k", setup_device_read_cmd_10k),
+    ("boot", setup_boot),
+]
+
+
+def measure_memory(run):
+    """Return the memory used by one run of a workload, in bytes."""
+    gc.collect()
+    if CPYTHON:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        try:
+            run()
+            return tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+    base = gc.mem_alloc()
+    gc.disable()
+    try:
+        run()
+        return gc.mem_alloc() - base
+    except MemoryError:
+        return -1
+    finally:
+        gc.enable()
+
+
+def run_workload(setup, runs):
+    """Return (median ms, min ms, memory bytes) for one workload."""
+    run = setup()
+    times = []
+    for _ in range(runs):
+        gc.collect()
+        start = time.ticks_us()
+        run()
+        times.append(time.ticks_diff(time.ticks_us(), start))
+    memory = measure_memory(run)
+    times.sort()
+    return times[len(times) // 2] / 1000, times[0] / 1000, memory
+
+
+def read_results(path):
+    """Return {workload: median_ms} from a previous run's output."""
+    results = {}
+    with real_open(path) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) >= 4 and not line.startswith("#") and fields[0] != "workload":
+                results[fields[0]] = float(fields[1])
+    return results
+
+
+def parse_arguments(argv):
+    options = {"runs": 5, "only": None, "compare": None}
+    index = 0
+    while index < len(argv):
+        argument = argv[index]
+        if argument in ("--runs", "--only", "--compare") and index + 1 < len(argv):
+            index += 1
+            options[argument[2:]] = argv[index]
+        else:
+            raise SystemExit("Usage: run.py [--runs N] [--only name,name] [--compare results.txt]")
+        index += 1
+    options["runs"] = int(options["runs"])
+    if options["only"]:
+        options["only"] = options["only"].split(",")
+    return options
+
+
+def main(argv):
+    options = parse_arguments(argv)
+    baseline = read_results(options["compare"]) if options["compare"] else None
+    root = make_scratch_root()
+    install_stand_ins(root)
+    implementation = "%s %s" % (sys.implementation.name,
+                                ".".join(str(part) for part in sys.implementation.version[:3]))
+    memory_kind = "tracemalloc-peak" if CPYTHON else "allocated-no-gc"
+    real_print("# angusto-bench format=%d impl=%s runs=%d mem=%s"
+               % (FORMAT_VERSION, implementation, options["runs"], memory_kind))
+    header = "%-22s %10s %10s %12s" % ("workload", "median_ms", "min_ms", "mem_bytes")
+    real_print(header + ("  change" if baseline else ""))
+    try:
+        for name, setup in WORKLOADS:
+            if options["only"] and name not in options["only"]:
+                continue
+            builtins.print = quiet_print
+            try:
+                median, fastest, memory = run_workload(setup, options["runs"])
+            finally:
+                builtins.print = real_print
+            line = "%-22s %10.3f %10.3f %12d" % (name, median, fastest, memory)
+            if baseline and name in baseline and baseline[name] > 0:
+                line += "  %+.1f%%" % ((median - baseline[name]) * 100 / baseline[name])
+            real_print(line)
+    finally:
+        os.chdir("/")
+        remove_host_tree(root)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
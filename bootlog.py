@@ -0,0 +1,15 @@
+import time
+
+# Boot phase timestamps as (phase, ticks_ms), in the order the phases were
+# reached. main.py imports this module first, so "start" is the moment the
+# bootloader began; ticks_ms counts from reset, so it also shows how long
+# the firmware took to get there.
+phases = []
+
+# How the bootloader chose to boot, for bootinfo
+mode = "shell started directly"
+
+def mark(phase):
+    phases.append((phase, time.ticks_ms()))
+
+mark("start")
@@ -0,0 +1,128 @@
+import uos
+import time
+import gzfile
+import jobs
+import shellenv
+import dircache
+from shellenv import error_flash
+from fsutil import walk, is_directory, normpath, WALK_FILE
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# How often the logrotate job checks the size of its logs
+ROTATE_CHECK_S = 60
+
+def parse_archive_arguments(arguments, allowed, usage):
+    flags = set()
+    paths = []
+    for argument in arguments:
+        if argument.startswith("-") and len(argument) > 1:
+            if argument not in allowed:
+                raise ValueError(f"Invalid option: {argument}")
+            flags.add(argument)
+        else:
+            paths.append(argument)
+    if len(paths) != 1:
+        raise ValueError(usage)
+    return flags, paths[0]
+
+def compress_one(path, keep):
+    start = time.ticks_ms()
+    size_in, size_out = gzfile.compress_file(path, path + gzfile.GZIP_SUFFIX)
+    if not keep:
+        uos.remove(path)
+    dircache.invalidate(normpath(path, shellenv.current_directory))
+    ratio = size_out * 100 // size_in if size_in else 100
+    print(f"{path}: {size_in:,} -> {size_out:,} bytes ({ratio}%) in {time.ticks_diff(time.ticks_ms(), start)} ms")
+    return size_in, size_out
+
+def gzip_file(arguments):
+    usage = "Usage: gzip [-k] [-r] <file|directory>"
+    try:
+        flags, path = parse_archive_arguments(arguments, ("-k", "-r"), usage)
+        keep = "-k" in flags
+        if not is_directory(path):
+            compress_one(path, keep)
+            return
+        if "-r" not in flags:
+            raise ValueError(f"'{path}' is a directory (use gzip -r)")
+        # Collect first: compressing adds files to the directories being walked
+        paths = [entry for entry, kind, size in walk(path)
+                 if kind == WALK_FILE and not gzfile.is_gzip(entry)]
+        total_in = 0
+        total_out = 0
+        for entry in paths:
+            size_in, size_out = compress_one(entry, keep)
+            total_in += size_in
+            total_out += size_out
+        print(f"{len(paths)} files: {total_in:,} -> {total_out:,} bytes")
+    except (OSError, ValueError) as e:
+        error_flash("minor")
+        print(f"gzip: {e}")
+
+def gunzip_file(arguments):
+    usage = "Usage: gunzip [-k] <file.gz>"
+    try:
+        flags, path = parse_archive_arguments(arguments, ("-k",), usage)
+        if not gzfile.is_gzip(path):
+            raise ValueError(f"'{path}' does not end in {gzfile.GZIP_SUFFIX}")
+        target = path[:-len(gzfile.GZIP_SUFFIX)]
+        start = time.ticks_ms()
+        size_in, size_out = gzfile.decompress_file(path, target)
+        if "-k" not in flags:
+            uos.remove(path)
+        dircache.invalidate(normpath(path, shellenv.current_directory))
+        print(f"{target}: {size_in:,} -> {size_out:,} bytes in {time.ticks_diff(time.ticks_ms(), start)} ms")
+    except (OSError, ValueError) as e:
+        error_flash("minor")
+        print(f"gunzip: {e}")
+
+async def rotation_job():
+    while gzfile.rotations:
+        try:
+            gzfile.check_rotations()
+        except OSError as e:
+            error_flash("minor")
+            print(f"\nlogrotate: {e}")
+        await asyncio.sleep(ROTATE_CHECK_S)
+
+def log_rotate(arguments):
+    usage = "Usage: logrotate [<file> <max_kb> [keep] | off <file> | now]"
+    if not arguments:
+        if not gzfile.rotations:
+            print("No logs are rotated.")
+        for path, (max_bytes, keep) in gzfile.rotations.items():
+            print(f"  {path:24} at {max_bytes // 1024} KB, keeping {keep} archives")
+        return
+    try:
+        if arguments[0] == "now":
+            rotated = gzfile.check_rotations()
+            print(f"Rotated {len(rotated)} log(s)")
+            return
+        # Logs are keyed by absolute path, since the job runs whatever the
+        # current directory is later
+        if arguments[0] == "off" and len(arguments) == 2:
+            path = normpath(arguments[1], shellenv.current_directory)
+            if gzfile.rotations.pop(path, None) is None:
+                raise ValueError(f"'{path}' is not rotated")
+            print(f"Stopped rotating '{path}'")
+            return
+        if len(arguments) not in (2, 3):
+            print(usage)
+            return
+        path = normpath(arguments[0], shellenv.current_directory)
+        max_bytes = int(arguments[1]) * 1024
+        keep = int(arguments[2]) if len(arguments) > 2 else 3
+        if max_bytes <= 0 or keep < 1:
+            raise ValueError("max_kb and keep must be at least 1")
+        gzfile.rotations[path] = (max_bytes, keep)
+        if gzfile.rotation_job not in jobs.jobs:
+            gzfile.rotation_job = jobs.spawn("logrotate", rotation_job())
+        print(f"Rotating '{path}' at {max_bytes // 1024} KB into {path}.1{gzfile.GZIP_SUFFIX} .. "
+              f"{path}.{keep}{gzfile.GZIP_SUFFIX}, checked every {ROTATE_CHECK_S} s")
+    except (OSError, ValueError) as e:
+        error_flash("minor")
+        print(f"logrotate: {e}")
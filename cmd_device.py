@@ -0,0 +1,406 @@
+import time
+from array import array
+import shellenv
+import dircache
+from shellenv import devman
+from devman import build_wave_table, wave_table_length, WAVE_SHAPES, WAVE_TABLE_MAX, REGISTRY_FILE
+from fsutil import iter_lines, normpath
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+def register_device(arguments):
+    if len(arguments) < 3:
+        print("Usage: device register <name> <pin> <mode> [pull]")
+        print("Modes: in, out, adc, pwm")
+        print("Pull (optional): up, down")
+        return
+        
+    name, pin, mode = arguments[:3]
+    pull = arguments[3] if len(arguments) > 3 else None
+    
+    try:
+        pin_num = int(pin)
+        devman.register_pin(pin_num, name, mode, pull)
+        print(f"Registered device '{name}' on pin {pin_num}")
+    except Exception as e:
+        print(f"Error registering device: {e}")
+
+def control_device(arguments):
+    if len(arguments) < 2:
+        print("Usage: device control <name> <value>")
+        print("Group values may be decimal, 0x hex or 0b binary")
+        return
+        
+    name, value = arguments[:2]
+    try:
+        if name in devman.groups:
+            # Group value: decimal, 0x hex or 0b binary
+            devman.write_group(name, int(value, 0))
+        elif name in devman.pwm_pins:
+            # Handle PWM value (0-100%)
+            duty = int(float(value) * 65535 / 100)
+            devman.set_pwm(name, duty)
+        else:
+            # Handle digital value (0 or 1)
+            devman.set_pin(name, int(value))
+        print(f"Set device '{name}' to {value}")
+    except Exception as e:
+        print(f"Error controlling device: {e}")
+
+def format_reading(name):
+    if name in devman.groups:
+        value = devman.read_group(name)
+        width = len(devman.groups[name].pin_nums)
+        return f"Group '{name}' reading: {value} (0x{value:X}, 0b{value:0{width}b})"
+    if name in devman.adc_pins:
+        value = devman.read_adc(name)
+        voltage = value * 3.3 / 65535
+        return f"ADC '{name}' reading: {value} ({voltage:.2f}V)"
+    value = devman.read_pin(name)
+    return f"Digital pin '{name}' reading: {value}"
+
+# Pipeline stages run synchronously, so a sampled read inside a pipeline
+# stalls the prompt and every background job; its total wait is capped
+PIPE_READ_MAX_MS = 1000
+
+def parse_read_arguments(arguments):
+    """Return (name, count, interval_ms) for device read."""
+    if not arguments:
+        raise ValueError("Usage: device read <name> [count] [interval_ms]")
+    count = int(arguments[1]) if len(arguments) > 1 else 1
+    interval_ms = int(arguments[2]) if len(arguments) > 2 else 0
+    if count < 1 or interval_ms < 0:
+        raise ValueError("count must be at least 1 and interval_ms not negative")
+    return arguments[0], count, interval_ms
+
+def iter_read(arguments, source=None):
+    """Yield count readings of a device, interval_ms apart (pipeline stage)."""
+    name, count, interval_ms = parse_read_arguments(arguments)
+    if (count - 1) * interval_ms > PIPE_READ_MAX_MS:
+        raise ValueError(f"device read in a pipeline may wait at most {PIPE_READ_MAX_MS} ms in total; "
+                         f"run it on its own or use 'device log' for longer sampling")
+    for index in range(count):
+        if index and interval_ms:
+            time.sleep_ms(interval_ms)
+        yield format_reading(name)
+
+async def read_device(arguments):
+    """Print count readings interval_ms apart, yielding to jobs while waiting."""
+    try:
+        name, count, interval_ms = parse_read_arguments(arguments)
+        for index in range(count):
+            if index and interval_ms:
+                await asyncio.sleep(interval_ms / 1000)
+            print(format_reading(name))
+    except Exception as e:
+        print(f"Error reading device: {e}")
+
+def list_devices(arguments=None):
+    devman.list_devices()
+
+def registry_path(arguments):
+    """Return the registry file to use as an absolute path, so it does not depend on cd."""
+    return normpath(arguments[0], shellenv.current_directory) if arguments else REGISTRY_FILE
+
+def save_devices(arguments):
+    path = registry_path(arguments)
+    try:
+        count = devman.save_registry(path)
+        dircache.invalidate(path)
+        print(f"Saved {count} devices to '{path}'")
+    except Exception as e:
+        print(f"Error saving devices: {e}")
+
+def load_devices(arguments):
+    path = registry_path(arguments)
+    try:
+        start = time.ticks_ms()
+        count = devman.load_registry(path)
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        print(f"Loaded {count} devices from '{path}' in {elapsed} ms")
+    except Exception as e:
+        print(f"Error loading devices: {e}")
+
+def load_wave_table(filename, amplitude):
+    """Read a custom wave table: one duty percentage (0-100) per line."""
+    levels = array('H')
+    with open(filename, 'rb') as file:
+        for line in iter_lines(file):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if len(levels) >= WAVE_TABLE_MAX:
+                raise ValueError(f"Wave table has more than {WAVE_TABLE_MAX} entries")
+            level = min(max(float(line), 0), 100)
+            levels.append(int(level * amplitude * 65535 / 100))
+    if len(levels) < 2:
+        raise ValueError("Wave table needs at least 2 entries")
+    return levels
+
+def wave_device(arguments):
+    if len(arguments) == 2 and arguments[1] == "stop":
+        if devman.stop_wave(arguments[0]):
+            print(f"Stopped wave on '{arguments[0]}'")
+        else:
+            print(f"No wave running on '{arguments[0]}'")
+        return
+    core1 = "--core1" in arguments
+    if core1:
+        arguments = [argument for argument in arguments if argument != "--core1"]
+    if len(arguments) < 3:
+        print("Usage: device wave <name> <shape|file> <freq_hz> [amplitude%] [--core1]")
+        print(f"       device wave <name> stop")
+        print(f"Shapes: {', '.join(WAVE_SHAPES)}; any other value is read as a file with one duty % per line")
+        return
+    name, shape = arguments[:2]
+    try:
+        freq = float(arguments[2])
+        amplitude = float(arguments[3]) / 100 if len(arguments) > 3 else 1.0
+        if freq <= 0:
+            raise ValueError("frequency must be positive")
+        if not 0 <= amplitude <= 1:
+            raise ValueError("amplitude must be between 0 and 100%")
+        if shape in WAVE_SHAPES:
+            table = build_wave_table(shape, wave_table_length(freq), amplitude)
+        else:
+            table = load_wave_table(shape, amplitude)
+        devman.start_wave(name, table, freq, core1)
+        where = " on core 1" if core1 else ""
+        print(f"Playing {shape} on '{name}' at {freq} Hz ({len(table)} steps, {amplitude:.0%} amplitude){where}")
+    except Exception as e:
+        print(f"Error starting wave: {e}")
+
+def freq_device(arguments):
+    if len(arguments) < 2:
+        print("Usage: device freq <name> <hz>")
+        return
+    name = arguments[0]
+    try:
+        devman.set_pwm_freq(name, int(arguments[1]))
+        print(f"Set PWM frequency of '{name}' to {arguments[1]} Hz")
+    except Exception as e:
+        print(f"Error setting PWM frequency: {e}")
+
+def watch_device(arguments):
+    if len(arguments) < 2:
+        print("Usage: device watch <name> rising|falling|both [debounce_ms]")
+        return
+    name, edge = arguments[:2]
+    try:
+        debounce = int(arguments[2]) if len(arguments) > 2 else 0
+        devman.watch(name, edge, debounce)
+        print(f"Watching {edge} edges on '{name}'" + (f" ({debounce} ms debounce)" if debounce else ""))
+    except Exception as e:
+        print(f"Error watching device: {e}")
+
+def unwatch_device(arguments):
+    if not arguments:
+        print("Usage: device unwatch <name>")
+        return
+    if devman.unwatch(arguments[0]):
+        print(f"Stopped watching '{arguments[0]}'")
+    else:
+        print(f"'{arguments[0]}' is not being watched")
+
+def events_device(arguments):
+    if not arguments:
+        print("Usage: device events <name> [count]")
+        return
+    name = arguments[0]
+    try:
+        limit = int(arguments[1]) if len(arguments) > 1 else 10
+        if name not in devman.watches:
+            raise ValueError(f"Pin '{name}' is not being watched")
+        watch = devman.watches[name]
+        count, bounces, head = watch.snapshot()
+        print(f"'{name}': {count} {watch.edge} edges, {bounces} ignored as bounces")
+        previous = None
+        for stamp in watch.recent(limit):
+            if previous is None:
+                print(f"  t={stamp} us")
+            else:
+                print(f"  t={stamp} us  (+{time.ticks_diff(stamp, previous)} us)")
+            previous = stamp
+    except Exception as e:
+        print(f"Error reading events: {e}")
+
+def rate_device(arguments):
+    if not arguments:
+        print("Usage: device rate <name>")
+        return
+    name = arguments[0]
+    try:
+        count, bounces, rate, shortest, average, longest, age = devman.edge_stats(name)
+        print(f"'{name}': {count} edges, {bounces} bounces")
+        if rate is None:
+            print("  Not enough edges to measure a rate yet")
+        else:
+            print(f"  Rate: {rate:.3f} edges/s over the last {min(count, devman.watches[name].size)} edges")
+            print(f"  Interval: min {shortest} us, avg {average} us, max {longest} us")
+        if age is not None:
+            print(f"  Last edge: {age // 1000} ms ago")
+    except Exception as e:
+        print(f"Error reading rate: {e}")
+
+def log_device(arguments):
+    usage = "Usage: device log <name> [name...] <interval_ms> <file> [--core1] | stop | status"
+    core1 = "--core1" in arguments
+    if core1:
+        arguments = [argument for argument in arguments if argument != "--core1"]
+    try:
+        if arguments == ["stop"]:
+            logger = devman.stop_log()
+            if logger is None:
+                print("Not logging.")
+            else:
+                print(f"Stopped logging to '{logger.path}': {logger.records} records, {logger.dropped} dropped")
+        elif arguments == ["status"]:
+            logger = devman.logger
+            if logger is None:
+                print("Not logging.")
+            else:
+                where = " on core 1" if logger.worker_slot is not None else ""
+                print(f"Logging {','.join(logger.names)} every {logger.interval_ms} ms to '{logger.path}'{where}")
+                print(f"  {logger.records} records, {logger.blocks} blocks of {logger.block_size} bytes written, {logger.dropped} dropped")
+        elif len(arguments) >= 3:
+            names = arguments[:-2]
+            interval = int(arguments[-2])
+            path = arguments[-1]
+            devman.start_log(names, interval, path, core1)
+            logger = devman.logger
+            where = " on core 1" if core1 else ""
+            print(f"Logging {','.join(names)} every {interval} ms to '{path}'{where} ({logger.record_size}-byte records, {logger.block_size}-byte blocks)")
+        else:
+            print(usage)
+    except Exception as e:
+        print(f"Error logging: {e}")
+
+def iter_export(arguments, source=None):
+    if not arguments:
+        raise ValueError("Usage: log export <logfile>")
+    from datalog import iter_csv
+    return iter_csv(arguments[0])
+
+def export_log(arguments):
+    if not arguments:
+        print("Usage: log export <logfile> [csvfile]")
+        return
+    try:
+        from datalog import iter_csv
+        if len(arguments) > 1:
+            rows = 0
+            with open(arguments[1], "w") as out:
+                for line in iter_csv(arguments[0]):
+                    out.write(line + "\n")
+                    rows += 1
+            print(f"Exported {rows - 1} records to '{arguments[1]}'")
+        else:
+            for line in iter_csv(arguments[0]):
+                print(line)
+    except Exception as e:
+        print(f"Error exporting log: {e}")
+
+def group_device(arguments):
+    usage = "Usage: device group create <name> [in|out] <pin> [pin...] | delete <name> | list"
+    if not arguments:
+        print(usage)
+        return
+    action = arguments[0]
+    try:
+        if action == "create" and len(arguments) >= 3:
+            name = arguments[1]
+            pins = arguments[2:]
+            mode = "out"
+            if pins[0] in ("in", "out"):
+                mode = pins[0]
+                pins = pins[1:]
+            devman.create_group(name, [int(pin) for pin in pins], mode)
+            print(f"Created {mode} group '{name}' on GPIO {' '.join(pins)} (first pin is bit 0)")
+        elif action == "delete" and len(arguments) >= 2:
+            devman.delete_group(arguments[1])
+            print(f"Deleted group '{arguments[1]}'")
+        elif action == "list":
+            for name, group in devman.groups.items():
+                pins = " ".join(str(pin_num) for pin_num in group.pin_nums)
+                print(f"  {name}: {group.mode} GPIO {pins}")
+            if not devman.groups:
+                print("No pin groups defined.")
+        else:
+            print(usage)
+    except Exception as e:
+        print(f"Error managing group: {e}")
+
+def sample_report(names, rate, count, late, elapsed):
+    """Return the summary lines for the last capture."""
+    achieved = count * 1000000 // max(elapsed, 1)
+    lines = [f"Captured {count} scans of {len(names)} channel(s) in {elapsed // 1000} ms ({achieved:,} scans/s)"]
+    if late:
+        lines.append(f"Warning: {late} scans started late; {rate} Hz is faster than this channel set can sustain")
+    if devman.sample_stored < count * len(names):
+        lines.append(f"Ring buffer kept the last {devman.sample_stored // len(names)} scans")
+    for channel, name in enumerate(names):
+        low, high, mean, rms = devman.sample_summary(channel)
+        lines.append(f"  {name:8} min {low:5}  max {high:5}  mean {mean:8.1f}  rms {rms:8.1f}  ({mean * 3.3 / 65535:.3f}V avg)")
+    return lines
+
+def sample_device(arguments):
+    usage = "Usage: device sample <name[,name...]> <rate_hz> <count> [--dump file] [--core1]"
+    if len(arguments) < 3:
+        print(usage)
+        print("Names: registered ADC devices, 26, 27, 28 or temp (internal sensor)")
+        return
+    names = arguments[0].split(",")
+    core1 = "--core1" in arguments
+    dump_path = None
+    if "--dump" in arguments:
+        index = arguments.index("--dump")
+        dump_path = arguments[index + 1] if index + 1 < len(arguments) else None
+        if dump_path is None or core1:
+            print(usage)
+            print("--dump writes flash, so it cannot be combined with --core1")
+            return
+    try:
+        rate = int(arguments[1])
+        count = int(arguments[2])
+        if core1:
+            def report(late, elapsed):
+                return sample_report(names, rate, count, late, elapsed)
+            task_id = devman.submit_sample(names, rate, count, report)
+            print(f"Capturing on core 1 as task {task_id}; 'bg result {task_id}' shows the summary")
+            return
+        start = time.ticks_us()
+        late = devman.sample(names, rate, count)
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        for line in sample_report(names, rate, count, late, elapsed):
+            print(line)
+        if dump_path:
+            written = devman.dump_samples(dump_path)
+            print(f"Wrote {written:,} bytes of raw u16 samples to '{dump_path}' (channels interleaved: {','.join(names)})")
+    except Exception as e:
+        print(f"Error sampling device: {e}")
+
+async def blink_device(arguments):
+    if len(arguments) < 2:
+        print("Usage: device blink <name> <interval_ms> [count]")
+        print("Add '&' to keep blinking in the background")
+        return
+    name = arguments[0]
+    try:
+        interval = int(arguments[1]) / 1000
+        count = int(arguments[2]) if len(arguments) > 2 else 0
+        value = 0
+        toggles = 0
+        while count == 0 or toggles < count * 2:
+            value ^= 1
+            devman.set_pin(name, value)
+            toggles += 1
+            await asyncio.sleep(interval)
+        devman.set_pin(name, 0)
+    except asyncio.CancelledError:
+        devman.set_pin(name, 0)
+        raise
+    except Exception as e:
+        print(f"Error blinking device: {e}")
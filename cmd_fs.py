@@ -0,0 +1,500 @@
+import uos
+import sys
+import time
+import shellenv
+import dircache
+from shellenv import error_flash
+from fsutil import (COPY_CHUNK_SIZE, get_copy_buffer, is_directory, stream_copy,
+                    copy_tree, remove_tree, iter_lines, find_tail_offset, LimitedReader, open_read,
+                    normpath)
+
+def print_working_directory(arguments=None):
+    print(f"Current working directory: {shellenv.current_directory}")
+
+def format_mtime(mtime):
+    t = time.localtime(mtime)
+    return f"{t[0]:04}-{t[1]:02}-{t[2]:02} {t[3]:02}:{t[4]:02}"
+
+def format_entry(name, is_dir, size, mtime, long_format):
+    if is_dir:
+        if long_format:
+            return f"[DIR]  {name:30} {'':>10}  {format_mtime(mtime)}"
+        return f"[DIR]  {name:30}"
+    if long_format:
+        return f"[FILE] {name:30} {size:10,}  {format_mtime(mtime)}"
+    return f"[FILE] {name:30} ({size:8,} bytes)"
+
+def scan_directory(directory, long_format, sort_key, pending, totals):
+    """Yield the listing of one directory from a single ilistdir pass.
+
+    totals is a [directories, files] list updated in place. Subdirectories
+    are pushed onto `pending` when a recursive listing is in progress
+    (pending is not None).
+    """
+    entries = None if sort_key is None else []
+    for entry in uos.ilistdir(directory):
+        name = entry[0]
+        is_dir = entry[1] == 0x4000
+        path = directory.rstrip("/") + "/" + name
+        size = 0
+        mtime = 0
+        if not is_dir:
+            size = entry[3] if len(entry) > 3 and entry[3] >= 0 else uos.stat(path)[6]
+        if long_format or sort_key == "t":
+            mtime = uos.stat(path)[8]
+        if is_dir:
+            totals[0] += 1
+            if pending is not None:
+                pending.append(path)
+        else:
+            totals[1] += 1
+        if entries is None:
+            yield format_entry(name, is_dir, size, mtime, long_format)
+        else:
+            entries.append((is_dir, name, size, mtime))
+    if entries:
+        if sort_key == "S":
+            entries.sort(key=lambda e: (not e[0], -e[2], e[1]))
+        elif sort_key == "t":
+            entries.sort(key=lambda e: (not e[0], -e[3], e[1]))
+        else:
+            entries.sort(key=lambda e: (not e[0], e[1]))
+        for is_dir, name, size, mtime in entries:
+            yield format_entry(name, is_dir, size, mtime, long_format)
+
+def parse_ls_arguments(arguments):
+    """Return (directory, long_format, recursive, sort_key) for ls options."""
+    directory = None
+    long_format = False
+    recursive = False
+    sort_key = "name"
+    for argument in arguments:
+        if argument.startswith("-") and len(argument) > 1:
+            for flag in argument[1:]:
+                if flag == "l":
+                    long_format = True
+                elif flag == "R":
+                    recursive = True
+                elif flag in "St":
+                    sort_key = flag
+                elif flag == "U":
+                    sort_key = None
+                else:
+                    raise ValueError(f"Invalid option for ls: -{flag}")
+        else:
+            directory = argument
+    if directory is None:
+        directory = shellenv.current_directory
+    return directory, long_format, recursive, sort_key
+
+def list_directory(directory, long_format, recursive, sort_key):
+    """Yield the lines of a directory listing."""
+    start = time.ticks_ms()
+    pending = [directory] if recursive else None
+    totals = [0, 0]
+    while True:
+        if recursive:
+            if not pending:
+                break
+            directory = pending.pop()
+        yield ""
+        yield f"Contents of {directory}:"
+        yield from scan_directory(directory, long_format, sort_key, pending, totals)
+        if not recursive:
+            break
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    yield ""
+    yield f"{totals[0] + totals[1]} entries ({totals[0]} dirs, {totals[1]} files) in {elapsed} ms"
+
+def iter_ls(arguments, source=None):
+    return list_directory(*parse_ls_arguments(arguments))
+
+def print_directory_contents(arguments=None):
+    try:
+        options = parse_ls_arguments(arguments or [])
+    except ValueError as e:
+        error_flash("minor")
+        print(e)
+        print("Usage: ls [-l] [-S|-t|-U] [-R] [directory]")
+        return
+    try:
+        for line in list_directory(*options):
+            print(line)
+    except Exception as e:
+        error_flash("critical")
+        print(f"Error reading directory contents: {e}")
+
+def make_directory(arguments):
+    if not arguments:
+        error_flash("minor")
+        print("Invalid command: mkdir requires a directory name")
+        return
+    directory_name = arguments[0]
+    try:
+        path = normpath(directory_name, shellenv.current_directory)
+        uos.mkdir(path)
+        dircache.invalidate(path)
+        print(f"Directory '{directory_name}' created successfully.")
+    except OSError as e:
+        error_flash("minor")
+        print(f"Error creating directory '{directory_name}': {e}")
+
+def remove_directory(arguments):
+    if not arguments:
+        error_flash("minor")
+        print("Invalid command: rmdir requires a directory name")
+        return
+    directory_name = arguments[0]
+    try:
+        path = normpath(directory_name, shellenv.current_directory)
+        uos.rmdir(path)
+        dircache.invalidate(path)
+        print(f"Directory '{directory_name}' removed successfully.")
+    except OSError as e:
+        error_flash("minor")
+        print(f"Error removing directory '{directory_name}': {e}")
+
+def change_directory(arguments):
+    if not arguments:
+        error_flash("minor")
+        print("Invalid command: cd requires a directory name")
+        return
+    # '.' and '..' are resolved here, so the new directory needs no getcwd()
+    new_directory = normpath(arguments[0], shellenv.current_directory)
+    try:
+        uos.chdir(new_directory)
+        shellenv.current_directory = new_directory
+    except OSError as e:
+        error_flash("minor")
+        print(f"Error changing directory to '{new_directory}': {e}")
+
+def delete_file(arguments):
+    if not arguments:
+        error_flash("minor")
+        print("Invalid command: delete requires a filename")
+        return
+    filename = arguments[0]
+    try:
+        full_path = normpath(filename, shellenv.current_directory)
+        uos.remove(full_path)
+        dircache.invalidate(full_path)
+        print(f"File '{filename}' deleted successfully.")
+    except OSError as e:
+        if e.args[0] == 2:
+            print(f"File not found: {filename}")
+        else:
+            print(f"Error deleting file '{filename}': {e}")
+    except Exception as e:
+        print(f"Unexpected error deleting file '{filename}': {e}")
+
+def parse_copy_arguments(arguments):
+    """Split cp/mv arguments into (paths, recursive, progress, chunk_size)."""
+    paths = []
+    recursive = False
+    progress = False
+    chunk_size = COPY_CHUNK_SIZE
+    index = 0
+    while index < len(arguments):
+        argument = arguments[index]
+        if argument == "-r":
+            recursive = True
+        elif argument in ("-p", "--progress"):
+            progress = True
+        elif argument == "--chunk":
+            index += 1
+            chunk_size = int(arguments[index])
+            if chunk_size <= 0:
+                raise ValueError("chunk size must be positive")
+        else:
+            paths.append(argument)
+        index += 1
+    return paths, recursive, progress, chunk_size
+
+def copy_path(source, destination, recursive, progress, chunk_size):
+    """Copy a file or (with recursive) a directory. Returns (files, bytes)."""
+    if is_directory(source):
+        if not recursive:
+            raise OSError(f"'{source}' is a directory (use -r)")
+        return copy_tree(source, destination, chunk_size, progress)
+    if is_directory(destination):
+        destination = destination + "/" + source.split("/")[-1]
+    cwd = shellenv.current_directory
+    if normpath(source, cwd) == normpath(destination, cwd):
+        raise OSError(f"'{source}' and '{destination}' are the same file")
+    return 1, stream_copy(source, destination, chunk_size, progress)
+
+def report_throughput(files, copied, start):
+    elapsed = max(time.ticks_diff(time.ticks_ms(), start), 1)
+    rate = copied * 1000 // elapsed
+    print(f"{files} file(s), {copied:,} bytes in {elapsed} ms ({rate:,} bytes/s)")
+
+def copy_file(arguments):
+    try:
+        paths, recursive, progress, chunk_size = parse_copy_arguments(arguments)
+    except (ValueError, IndexError):
+        paths = []
+    if len(paths) != 2:
+        error_flash("minor")
+        print("Invalid command: cp requires source and destination filenames")
+        print("Usage: cp [-r] [-p] [--chunk bytes] <source> <dest>")
+        return
+    source, destination = paths
+    try:
+        start = time.ticks_ms()
+        files, copied = copy_path(source, destination, recursive, progress, chunk_size)
+        print(f"File '{source}' copied to '{destination}' successfully.")
+        report_throughput(files, copied, start)
+    except Exception as e:
+        error_flash("minor")
+        print(f"Error copying file: {e}")
+    finally:
+        dircache.invalidate(normpath(destination, shellenv.current_directory))
+
+def move_file(arguments):
+    try:
+        paths, recursive, progress, chunk_size = parse_copy_arguments(arguments)
+    except (ValueError, IndexError):
+        paths = []
+    if len(paths) != 2:
+        error_flash("minor")
+        print("Invalid command: mv requires source and destination filenames")
+        print("Usage: mv [-p] [--chunk bytes] <source> <dest>")
+        return
+    source, destination = paths
+    try:
+        try:
+            uos.rename(source, destination)
+        except OSError:
+            # Rename fails across filesystems; fall back to copy and delete
+            start = time.ticks_ms()
+            files, copied = copy_path(source, destination, True, progress, chunk_size)
+            if is_directory(source):
+                remove_tree(source)
+            else:
+                uos.remove(source)
+            report_throughput(files, copied, start)
+        print(f"File '{source}' moved to '{destination}' successfully.")
+    except Exception as e:
+        error_flash("minor")
+        print(f"Error moving file: {e}")
+    finally:
+        dircache.invalidate(normpath(source, shellenv.current_directory))
+        dircache.invalidate(normpath(destination, shellenv.current_directory))
+
+# Lines shown per screen in cat's pager mode
+CAT_PAGE_LINES = 20
+CAT_USAGE = "Usage: cat <filename> [--head N] [--tail N] [--range start:end] [--page [lines]]"
+
+try:
+    raw_stdout = sys.stdout.buffer
+except AttributeError:
+    raw_stdout = sys.stdout
+
+def parse_range(text):
+    """Parse a 'start:end' byte range; either side may be omitted."""
+    start, _, end = text.partition(":")
+    start = int(start) if start else 0
+    end = int(end) if end else None
+    if start < 0 or (end is not None and end < start):
+        raise ValueError(f"Invalid byte range '{text}': start must not be negative or after end")
+    return start, end
+
+def cat_range(file, start, end):
+    """Write bytes [start, end) of a file straight to stdout."""
+    buffer = get_copy_buffer()
+    file.seek(start)
+    remaining = None if end is None else end - start
+    while remaining is None or remaining > 0:
+        size = len(buffer) if remaining is None else min(len(buffer), remaining)
+        count = file.readinto(buffer[:size])
+        if not count:
+            break
+        raw_stdout.write(buffer[:count])
+        if remaining is not None:
+            remaining -= count
+    print()
+
+def wait_for_page():
+    """Pause the pager. Returns False if the user asked to quit."""
+    print("-- More -- (Enter: next page, q: quit)", end="")
+    # A CRLF terminal sends Enter as two characters; the line feed after a
+    # carriage return is not a second keypress (lineedit tracks the same)
+    import lineedit
+    key = sys.stdin.read(1)
+    while key == "\n" and lineedit.last_was_cr:
+        lineedit.last_was_cr = False
+        key = sys.stdin.read(1)
+    lineedit.last_was_cr = key == "\r"
+    print()
+    return key not in ("q", "Q")
+
+def parse_cat_arguments(arguments):
+    """Return (filename, head, tail, byte_range, page) for cat options."""
+    filename = None
+    head = None
+    tail = None
+    byte_range = None
+    page = 0
+    index = 0
+    while index < len(arguments):
+        argument = arguments[index]
+        if argument in ("--head", "--tail", "--range"):
+            index += 1
+            if index == len(arguments):
+                raise ValueError(f"{argument} needs a value\n{CAT_USAGE}")
+            if argument == "--range":
+                byte_range = parse_range(arguments[index])
+            elif not arguments[index].isdigit():
+                raise ValueError(f"{argument} needs a number of lines\n{CAT_USAGE}")
+            elif argument == "--head":
+                head = int(arguments[index])
+            else:
+                tail = int(arguments[index])
+        elif argument == "--page":
+            page = CAT_PAGE_LINES
+            if index + 1 < len(arguments) and arguments[index + 1].isdigit():
+                index += 1
+                page = int(arguments[index])
+        else:
+            filename = argument
+        index += 1
+    return filename, head, tail, byte_range, page
+
+def iter_file(filename, head=None, tail=None, byte_range=None):
+    """Yield the lines of a file, optionally limited to its head, tail or a byte range.
+
+    .gz files are decompressed as they are read; they can only be read
+    front to back, so their tail is kept in a ring of lines instead.
+    """
+    if filename.endswith(".gz"):
+        if byte_range is not None:
+            raise ValueError("--range cannot be used on a compressed file")
+        with open_read(filename) as file:
+            lines = iter_lines(file)
+            if tail is not None:
+                lines = last_lines(lines, tail)
+            elif head is not None:
+                lines = take_lines(lines, head)
+            for line in lines:
+                yield line
+        return
+    with open(filename, 'rb') as file:
+        reader = file
+        if byte_range is not None:
+            file.seek(byte_range[0])
+            if byte_range[1] is not None:
+                reader = LimitedReader(file, byte_range[1] - byte_range[0])
+        elif tail is not None:
+            file.seek(find_tail_offset(file, tail))
+        lines = iter_lines(reader)
+        if head is not None:
+            lines = take_lines(lines, head)
+        for line in lines:
+            yield line
+
+def take_lines(lines, count):
+    """Yield the first count lines of a line iterator."""
+    if count <= 0:
+        return
+    for line in lines:
+        yield line
+        count -= 1
+        if count == 0:
+            break
+
+def last_lines(lines, count):
+    """Yield the last count lines of a line iterator, holding only those in RAM."""
+    if count <= 0:
+        return
+    ring = [None] * count
+    seen = 0
+    for line in lines:
+        ring[seen % count] = line
+        seen += 1
+    for index in range(max(0, seen - count), seen):
+        yield ring[index % count]
+
+def iter_cat(arguments, source=None):
+    filename, head, tail, byte_range, page = parse_cat_arguments(arguments)
+    if filename is None:
+        if source is None:
+            raise ValueError("cat requires a filename")
+        if tail is not None:
+            source = last_lines(source, tail)
+        return source if head is None else take_lines(source, head)
+    return iter_file(filename, head, tail, byte_range)
+
+def cat_file(arguments):
+    try:
+        filename, head, tail, byte_range, page = parse_cat_arguments(arguments)
+    except ValueError as e:
+        error_flash("minor")
+        print(e)
+        return
+    if filename is None:
+        error_flash("minor")
+        print("Invalid command: cat requires a filename")
+        print(CAT_USAGE)
+        return
+    try:
+        if byte_range is not None:
+            if filename.endswith(".gz"):
+                raise ValueError("--range cannot be used on a compressed file")
+            with open(filename, 'rb') as file:
+                cat_range(file, byte_range[0], byte_range[1])
+            return
+        shown = 0
+        for line in iter_file(filename, head, tail):
+            print(line)
+            shown += 1
+            if page and shown % page == 0 and not wait_for_page():
+                break
+    except Exception as e:
+        error_flash("minor")
+        print(f"Error reading file '{filename}': {e}")
+
+def split_count_argument(arguments, piped=False, default=10):
+    """Split head/tail arguments of the form [N] [filename]."""
+    if arguments and arguments[0].lstrip("-").isdigit() and (piped or len(arguments) > 1):
+        return int(arguments[0].lstrip("-")), arguments[1:]
+    return default, arguments
+
+def iter_head(arguments, source=None):
+    count, rest = split_count_argument(arguments, source is not None)
+    if rest:
+        return iter_file(rest[0], head=count)
+    if source is None:
+        raise ValueError("Usage: head [N] <filename>")
+    return take_lines(source, count)
+
+def iter_tail(arguments, source=None):
+    count, rest = split_count_argument(arguments, source is not None)
+    if rest:
+        return iter_file(rest[0], tail=count)
+    if source is None:
+        raise ValueError("Usage: tail [N] <filename>")
+    return last_lines(source, count)
+
+def head_file(arguments):
+    if not arguments:
+        error_flash("minor")
+        print("Usage: head [N] <filename>")
+        return
+    try:
+        for line in iter_head(arguments):
+            print(line)
+    except Exception as e:
+        error_flash("minor")
+        print(f"Error reading file: {e}")
+
+def tail_file(arguments):
+    if not arguments:
+        error_flash("minor")
+        print("Usage: tail [N] <filename>")
+        return
+    try:
+        for line in iter_tail(arguments):
+            print(line)
+    except Exception as e:
+        error_flash("minor")
+        print(f"Error reading file: {e}")
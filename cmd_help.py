@@ -0,0 +1,63 @@
+from commands import command_functions
+
+def microshell_help(command=None):
+    if command:
+        if command[0] in command_functions:
+            print(f"Help for '{command[0]}':")
+            if command[0] == "ls":
+                print(f"ls [-l] [-S|-t|-U] [-R] [directory]: List files within the current or specified directory")
+                print(f"  -l  long format with modification times")
+                print(f"  -S  sort by size, largest first")
+                print(f"  -t  sort by modification time, newest first")
+                print(f"  -U  unsorted; entries print as they are read")
+                print(f"  -R  list subdirectories recursively")
+            elif command[0] == "cd":
+                print(f"cd <directory>      : Change the current directory (supports relative paths, '.' and '..')")
+            elif command[0] == "temp":
+                print(f"temp [--watch [interval_s] [count]]: Show the oversampled CPU temperature, optionally repeating (10 readings by default, 0 until killed)")
+                print(f"  --monitor <interval_s> [minutes]  sample in the background into a history ring ('--monitor off' stops)")
+                print(f"  --history                         show min/max/avg and the trend per hour of the history")
+                print(f"  --alarm <high_C> [low_C]          flash the LED when a reading leaves the range ('--alarm off' clears)")
+            # Add more detailed descriptions for each command
+        else:
+            print(f"No help available for command '{command[0]}'.")
+    else:
+        print(f"Available commands:")
+        print(f"ls [-l] [-S|-t|-U] [-R] [directory]: List files within the current or specified directory")
+        print(f"cd <directory>      : Change the current directory")
+        print(f"pwd                 : Print the current working directory")
+        print(f"delete/del <filename>: Delete a file")
+        print(f"mkdir <dirname>     : Create a new directory")
+        print(f"rmdir <dirname>     : Remove an existing directory")
+        print(f"notepad [filename]  : Open a line editor for files of any size ('exit' saves, 'quit' discards, 'list [n]' shows lines)")
+        print(f"cp [-r] [-p] [--chunk N] <source> <dest>: Copy a file or directory")
+        print(f"mv [-p] [--chunk N] <source> <dest>: Move a file or directory")
+        print(f"send <file> / recv <file>: Binary file transfer with tools/pico_xfer.py on the host")
+        print(f"gzip [-k] [-r] <path> / gunzip [-k] <file.gz>: Compress or expand files (cat/grep read .gz directly)")
+        print(f"logrotate [<file> <max_kb> [keep]]: Compress a log into <file>.1.gz once it reaches max_kb")
+        print(f"run <script.py> [--dry-run] [--no-cache]: Execute a Python script (cached as bytecode)")
+        print(f"cat <filename> [--head N] [--tail N] [--range a:b] [--page [lines]]: Display a file")
+        print(f"head [N] <filename> : Show the first N lines of a file (default 10)")
+        print(f"tail [N] <filename> : Show the last N lines of a file (default 10)")
+        print(f"grep [-r] [-v] [-i] [-c] [-n] <pattern> [path]: Show lines containing a pattern")
+        print(f"find [dir] [-name pattern] [-size [+|-]N[k|M]] [-type f|d]: Search for files")
+        print(f"du [-s] [dir]       : Show disk usage per directory")
+        print(f"hash [-r] [--no-cache] <path>: Show SHA-256 digests (sha256sum format), cached by size and mtime")
+        print(f"wc [-l] [-w] [-c] [filename]: Count lines, words and bytes")
+        print(f"sort [-n] [-r] [-k field] [filename]: Sort up to 500 lines (-n numeric, -r reverse, -k by field)")
+        print(f"cmd | cmd, cmd > file, cmd >> file: Pipe output between commands or into a file")
+        print(f"device <subcommand> : Manage GPIO/ADC/PWM devices (type 'device' to list subcommands)")
+        print(f"log export <log> [csv]: Convert a binary device log to CSV")
+        print(f"memory              : Display memory usage information")
+        print(f"modules [unload]    : List loaded command modules, or unload them to free RAM")
+        print(f"history             : List recent commands (!n or !! repeats one; up/down arrows recall, Tab completes)")
+        print(f"jobs                : List background jobs (start one by ending a command with '&')")
+        print(f"kill <job id>       : Stop a background job")
+        print(f"bg [<command...>]   : Run a command or pipeline on core 1; 'bg result <id>' shows its output")
+        print(f"time <command...>   : Measure one command's latency and heap allocation")
+        print(f"stats [reset|on|off]: Show per-command latency and allocation statistics")
+        print(f"led list|play|define: List, play or define status LED patterns")
+        print(f"bootinfo            : Show boot mode and boot phase timings")
+        print(f"reboot              : Reboot the Raspberry Pi Pico")
+        print(f"temp [--watch|--monitor|--history|--alarm]: Display or monitor the CPU temperature ('help temp')")
+        print(f"about               : Information about Angusto")
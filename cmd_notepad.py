@@ -0,0 +1,209 @@
+import uos
+import time
+from array import array
+import shellenv
+import dircache
+from shellenv import error_flash
+from fsutil import get_copy_buffer, find_newline, copy_range, normpath
+
+# Lines shown around the cursor by 'list'
+WINDOW_LINES = 10
+
+def index_lines(file):
+    """Return (offsets, ends_with_newline) for an open binary file.
+
+    offsets[i] is where line i starts; a final entry holds the file size, so
+    line i spans offsets[i]:offsets[i + 1]. Only offsets are kept in RAM.
+    """
+    buffer = get_copy_buffer()
+    offsets = array('I', [0])
+    position = 0
+    last = -1
+    while True:
+        count = file.readinto(buffer)
+        if not count:
+            break
+        start = 0
+        while True:
+            end = find_newline(buffer, start, count)
+            if end < 0:
+                break
+            offsets.append(position + end + 1)
+            start = end + 1
+        last = buffer[count - 1]
+        position += count
+    ends_with_newline = last == 10 or position == 0
+    if not ends_with_newline:
+        offsets.append(position)
+    return offsets, ends_with_newline
+
+class Document:
+    """A file being edited: original line offsets plus an edit journal.
+
+    Unchanged lines are read from the file on demand; edited lines live in
+    the journal and new lines in the append list until the file is saved.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+        self.offsets = array('I', [0])
+        self.ends_with_newline = True
+        self.journal = {}
+        self.appended = []
+        try:
+            uos.stat(filename)
+            self.file = open(filename, 'rb')
+            self.offsets, self.ends_with_newline = index_lines(self.file)
+        except OSError:
+            pass
+
+    def original_lines(self):
+        return len(self.offsets) - 1
+
+    def line_count(self):
+        return self.original_lines() + len(self.appended)
+
+    def get_line(self, index):
+        if index in self.journal:
+            return self.journal[index]
+        if index >= self.original_lines():
+            return self.appended[index - self.original_lines()]
+        self.file.seek(self.offsets[index])
+        data = self.file.read(self.offsets[index + 1] - self.offsets[index])
+        return str(data, "utf-8").rstrip("\r\n")
+
+    def set_line(self, index, text):
+        """Replace a line; returns the previous journal entry (or None)."""
+        if index >= self.original_lines():
+            previous = self.appended[index - self.original_lines()]
+            self.appended[index - self.original_lines()] = text
+            return previous
+        previous = self.journal.get(index)
+        self.journal[index] = text
+        return previous
+
+    def save(self):
+        """Write changes back. Appends go straight to the end of the file;
+        edits are merged with the original into a temp file and renamed."""
+        if not self.journal:
+            if not self.appended:
+                return
+            if self.file:
+                self.file.close()
+                self.file = None
+            with open(self.filename, 'ab') as out:
+                if not self.ends_with_newline:
+                    out.write(b"\n")
+                for line in self.appended:
+                    out.write(line.encode() + b"\n")
+            return
+        temp_name = self.filename + ".tmp"
+        buffer = get_copy_buffer()
+        with open(temp_name, 'wb') as out:
+            position = 0
+            for index in sorted(self.journal):
+                copy_range(self.file, out, position, self.offsets[index], buffer)
+                out.write(self.journal[index].encode() + b"\n")
+                position = self.offsets[index + 1]
+            copy_range(self.file, out, position, self.offsets[-1], buffer)
+            if self.appended and not self.ends_with_newline and position < self.offsets[-1]:
+                out.write(b"\n")
+            for line in self.appended:
+                out.write(line.encode() + b"\n")
+        self.close()
+        try:
+            uos.rename(temp_name, self.filename)
+        except OSError:
+            uos.remove(self.filename)
+            uos.rename(temp_name, self.filename)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+def show_window(document, center):
+    """Print WINDOW_LINES lines around line index center."""
+    total = document.line_count()
+    start = max(0, min(center - WINDOW_LINES // 2, total - WINDOW_LINES))
+    for index in range(start, min(total, start + WINDOW_LINES)):
+        marker = "*" if index in document.journal or index >= document.original_lines() else " "
+        print(f"{index + 1}:{marker}{document.get_line(index)}")
+
+def notepad(arguments):
+    if len(arguments) > 1:
+        error_flash()
+        print("Invalid command: notepad only accepts an optional filename argument.")
+        return
+
+    filename = "notepad.txt" if not arguments else arguments[0]
+    undo_stack = []
+    document = None
+
+    try:
+        start = time.ticks_ms()
+        document = Document(filename)
+        if document.file:
+            elapsed = time.ticks_diff(time.ticks_ms(), start)
+            print(f"Loaded '{filename}': {document.original_lines()} lines indexed in {elapsed} ms")
+            show_window(document, document.line_count())
+        else:
+            print(f"Creating new file: {filename}")
+
+        print("Enter text for the notepad. Type 'exit' on a new line to save and exit, 'quit' to discard.")
+        print("Use 'undo' to undo the last added or edited line.")
+        print("To edit an existing line, type the line number followed by the new content.")
+        print("Use 'list [line]' to show the lines around a line number.")
+
+        while True:
+            line_number = document.line_count()
+            user_input = input(f"{line_number + 1}: ").strip()
+            command = user_input.lower()
+
+            if command == "exit":
+                break
+            elif command == "quit":
+                document.close()
+                print(f"Discarded changes to '{filename}'")
+                return
+            elif command == "undo":
+                if undo_stack:
+                    index, previous = undo_stack.pop()
+                    if previous is None and index >= document.original_lines():
+                        removed_line = document.appended.pop()
+                        print(f"Removed last added line: {removed_line}")
+                    elif previous is None:
+                        del document.journal[index]
+                        print(f"Restored line {index + 1}")
+                    else:
+                        document.set_line(index, previous)
+                        print(f"Restored line {index + 1}")
+                else:
+                    print("Nothing to undo.")
+            elif command == "list" or command.startswith("list "):
+                target = command[5:].strip()
+                show_window(document, int(target) - 1 if target.isdigit() else line_number)
+            elif user_input.isdigit():
+                edit_line = int(user_input) - 1
+                if 0 <= edit_line < line_number:
+                    print(f"Current: {document.get_line(edit_line)}")
+                    new_content = input(f"Enter new content for line {edit_line + 1}: ")
+                    undo_stack.append((edit_line, document.set_line(edit_line, new_content)))
+                else:
+                    print("Invalid line number.")
+            else:
+                document.appended.append(user_input)
+                undo_stack.append((line_number, None))
+
+        edits = len(document.journal)
+        added = len(document.appended)
+        document.save()
+        dircache.invalidate(normpath(filename, shellenv.current_directory))
+        print(f"\nNotepad contents saved to '{filename}' ({edits} edited, {added} added lines)")
+
+    except Exception as e:
+        error_flash()
+        print(f"Unexpected error in notepad: {e}")
+    finally:
+        if document:
+            document.close()
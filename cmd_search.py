@@ -0,0 +1,152 @@
+import time
+import shellenv
+from fsutil import walk, match_pattern, is_directory, normpath, WALK_FILE, WALK_DIR
+from pipeline import print_lines
+
+SIZE_UNITS = {"k": 1024, "K": 1024, "M": 1024 * 1024}
+
+def parse_size(text):
+    """Parse a find -size value such as +100k into (comparison, bytes)."""
+    comparison = 0
+    if text[:1] in "+-":
+        comparison = 1 if text[0] == "+" else -1
+        text = text[1:]
+    scale = 1
+    if text[-1:] in SIZE_UNITS:
+        scale = SIZE_UNITS[text[-1]]
+        text = text[:-1]
+    return comparison, int(text) * scale
+
+def parse_find_arguments(arguments):
+    """Return (directory, name pattern, size filter, type) for find options."""
+    directory = None
+    pattern = None
+    size = None
+    entry_type = None
+    index = 0
+    while index < len(arguments):
+        argument = arguments[index]
+        if argument in ("-name", "-size", "-type"):
+            index += 1
+            if index >= len(arguments):
+                raise ValueError(f"find: {argument} needs a value")
+            value = arguments[index]
+            if argument == "-name":
+                pattern = value
+            elif argument == "-size":
+                size = parse_size(value)
+            elif value in ("f", "d"):
+                entry_type = value
+            else:
+                raise ValueError("find: -type must be f or d")
+        elif argument.startswith("-"):
+            raise ValueError(f"Invalid option for find: {argument}")
+        else:
+            directory = argument
+        index += 1
+    if directory is None:
+        directory = shellenv.current_directory
+    return directory, pattern, size, entry_type
+
+def size_matches(size, size_filter):
+    comparison, limit = size_filter
+    if comparison > 0:
+        return size > limit
+    if comparison < 0:
+        return size < limit
+    return size == limit
+
+def iter_find(arguments, source=None):
+    """Yield the paths below a directory that match every given filter."""
+    directory, pattern, size_filter, entry_type = parse_find_arguments(arguments)
+    start = time.ticks_ms()
+    scanned = 0
+    found = 0
+    for path, kind, size in walk(directory):
+        scanned += 1
+        if entry_type is not None and (entry_type == "d") != (kind == WALK_DIR):
+            continue
+        if size_filter is not None and (kind == WALK_DIR or not size_matches(size, size_filter)):
+            continue
+        if pattern is not None and not match_pattern(pattern, path[path.rfind("/") + 1:]):
+            continue
+        found += 1
+        yield path
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    print(f"{found} found, {scanned} entries scanned in {elapsed} ms")
+
+def iter_du(arguments, source=None):
+    """Yield the total size of each directory below a directory, deepest first."""
+    summary = "-s" in arguments
+    words = [argument for argument in arguments if argument != "-s"]
+    if len(words) > 1 or (words and words[0].startswith("-")):
+        raise ValueError("Usage: du [-s] [directory]")
+    directory = words[0] if words else shellenv.current_directory
+    start = time.ticks_ms()
+    totals = [0]
+    files = 0
+    directories = 0
+    for path, kind, size in walk(directory, leave=True):
+        if kind == WALK_FILE:
+            totals[-1] += size
+            files += 1
+        elif kind == WALK_DIR:
+            totals.append(0)
+            directories += 1
+        else:
+            size = totals.pop()
+            if totals:
+                totals[-1] += size
+            if not summary or not totals:
+                yield f"{size:>12,}  {path}"
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    print(f"{files} files in {directories} directories scanned in {elapsed} ms")
+
+def iter_hash(arguments, source=None):
+    """Yield 'digest  path' lines in sha256sum format for a file or a tree."""
+    import hashcache
+    recursive = "-r" in arguments
+    refresh = "--no-cache" in arguments
+    words = [argument for argument in arguments if argument not in ("-r", "--no-cache")]
+    if len(words) != 1 or words[0].startswith("-"):
+        raise ValueError("Usage: hash [-r] [--no-cache] <path>")
+    top = normpath(words[0], shellenv.current_directory)
+    start = time.ticks_ms()
+    hashed = 0
+    cached = 0
+    hashed_bytes = 0
+    try:
+        if not is_directory(top):
+            value, from_cache = hashcache.digest(top, refresh)
+            yield f"{value}  {top}"
+            return
+        if not recursive:
+            raise ValueError(f"'{top}' is a directory (use hash -r)")
+        seen = set() if top == "/" else None
+        for path, kind, size in walk(top):
+            if kind != WALK_FILE or path.startswith(hashcache.CACHE_FILE):
+                continue
+            value, from_cache = hashcache.digest(path, refresh)
+            if from_cache:
+                cached += 1
+            else:
+                hashed += 1
+                hashed_bytes += size
+            if seen is not None:
+                seen.add(path)
+            yield f"{value}  {path}"
+        if seen is not None:
+            hashcache.prune(seen)
+    finally:
+        hashcache.save()
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    print(f"{hashed + cached} files: {cached} from cache, {hashed} hashed ({hashed_bytes:,} bytes) in {elapsed} ms")
+
+def find_files(arguments):
+    print_lines(iter_find, arguments)
+
+def disk_usage(arguments):
+    print_lines(iter_du, arguments)
+
+def hash_files(arguments):
+    print_lines(iter_hash, arguments)
@@ -0,0 +1,333 @@
+import time
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+import machine
+import gc
+import codecache
+import commands
+import jobs
+import cmdstats
+import bootlog
+import ledpat
+import worker
+import fsutil
+from shellenv import error_flash
+
+def run_script(arguments):
+    script_name = None
+    for argument in arguments:
+        if not argument.startswith("--"):
+            script_name = argument
+            break
+    if script_name is None:
+        error_flash("minor")
+        print("Invalid command: run requires a script name - correct usage 'run script.py'")
+        return
+
+    dry_run = '--dry-run' in arguments
+    use_cache = '--no-cache' not in arguments
+
+    try:
+        if dry_run:
+            print(f"Dry run: {script_name}")
+            commands.resolve(commands.command_functions["cat"])([script_name])
+            return
+        path = codecache.find_mpy(script_name) if use_cache else None
+        if path is not None:
+            print(f"Executing script: {script_name} (precompiled {path})")
+            gc.collect()
+            codecache.run_mpy(path)
+        else:
+            start = time.ticks_ms()
+            code, from_cache = codecache.load_code(script_name, use_cache)
+            elapsed = time.ticks_diff(time.ticks_ms(), start)
+            source = "bytecode cache" if from_cache else "source"
+            print(f"Executing script: {script_name} (loaded from {source} in {elapsed} ms)")
+            gc.collect()
+            exec(code)
+    except Exception as e:
+        error_flash("critical")
+        print(f"Error executing script '{script_name}': {e}")
+
+def display_memory_usage(arguments=None):
+    gc.collect()
+    free_mem = gc.mem_free()
+    alloc_mem = gc.mem_alloc()
+    total_mem = free_mem + alloc_mem
+    print(f"Memory Usage:")
+    print(f"Free:      {free_mem:,} bytes")
+    print(f"Allocated: {alloc_mem:,} bytes")
+    print(f"Total:     {total_mem:,} bytes")
+    print(f"Used:      {alloc_mem / total_mem:.2%}")
+
+def reboot_pico(arguments=None):
+    print("Rebooting Raspberry Pi Pico...You may need to reconnect.")
+    time.sleep(1)
+    machine.reset()
+    
+# Readings temp --watch prints when no count is given; 0 watches until the
+# job is killed, which only makes sense with '&'
+WATCH_COUNT = 10
+
+def parse_centi(text):
+    """Parse a temperature in degrees C into centi-degrees."""
+    return int(round(float(text) * 100))
+
+async def check_temperature(arguments=None):
+    usage = ("Usage: temp [--watch [interval_s] [count]] [--monitor <interval_s> [minutes] | --monitor off]\n"
+             "            [--history] [--alarm <high_C> [low_C] | --alarm off]")
+    import tempmon
+    format_centi = tempmon.format_centi
+    if not arguments:
+        print(f"Current CPU temperature: {format_centi(tempmon.read_centi())} "
+              f"(average of {tempmon.OVERSAMPLE} reads)")
+        if tempmon.timer is not None:
+            print(f"Monitoring every {tempmon.interval_s} s, {tempmon.history_count}/{len(tempmon.history)} readings kept")
+        if tempmon.alarm_count:
+            print(f"Alarm tripped {tempmon.alarm_count} time(s), last at {format_centi(tempmon.alarm_reading)} "
+                  f"{time.ticks_diff(time.ticks_ms(), tempmon.alarm_ms) // 1000} s ago")
+        return
+    option = arguments[0]
+    try:
+        if option == "--watch":
+            interval = float(arguments[1]) if len(arguments) > 1 else 1
+            count = int(arguments[2]) if len(arguments) > 2 else WATCH_COUNT
+            if count < 0:
+                raise ValueError("count must be 0 (until killed) or more")
+            shown = 0
+            while count == 0 or shown < count:
+                centi = tempmon.read_centi()
+                tempmon.check_alarm(centi)
+                print(f"{format_centi(centi)}{'  ALARM' if tempmon.alarm_active else ''}")
+                shown += 1
+                if count == 0 or shown < count:
+                    await asyncio.sleep(interval)
+        elif option == "--monitor" and len(arguments) > 1:
+            if arguments[1] == "off":
+                tempmon.stop()
+                print("Temperature monitoring stopped; history kept")
+                return
+            every = int(arguments[1])
+            minutes = int(arguments[2]) if len(arguments) > 2 else 60
+            if every < 1 or minutes < 1:
+                raise ValueError("interval and minutes must be at least 1")
+            size = tempmon.start(every, minutes)
+            print(f"Monitoring temperature every {every} s ({size} readings, {size * 2} bytes of history)")
+        elif option == "--history":
+            count, low, high, mean, trend = tempmon.summary()
+            if not count:
+                print("No temperature history (start it with 'temp --monitor <interval_s>')")
+                return
+            span = (count - 1) * tempmon.interval_s
+            print(f"{count} readings over {span // 60} min {span % 60} s")
+            print(f"  min {format_centi(low)}  max {format_centi(high)}  avg {format_centi(mean)}")
+            print(f"  trend {'+' if trend >= 0 else ''}{format_centi(trend)} per hour")
+        elif option == "--alarm" and len(arguments) > 1:
+            if arguments[1] == "off":
+                tempmon.set_alarm()
+                print("Temperature alarm cleared")
+                return
+            high = parse_centi(arguments[1])
+            low = parse_centi(arguments[2]) if len(arguments) > 2 else None
+            tempmon.set_alarm(high, low)
+            print(f"Temperature alarm above {format_centi(high)}"
+                  f"{' or below ' + format_centi(low) if low is not None else ''}"
+                  f"{'' if tempmon.timer is not None else ' (checked by --watch or --monitor)'}")
+        else:
+            print(usage)
+    except ValueError as e:
+        error_flash("minor")
+        print(f"Error: {e}")
+    except MemoryError:
+        error_flash("minor")
+        print("Error: not enough memory for the temperature history; "
+              "use a longer interval or fewer minutes")
+
+def list_modules(arguments=None):
+    if arguments and arguments[0] == "unload":
+        count = commands.unload_modules()
+        print(f"Unloaded {count} command module(s). Free heap: {gc.mem_free():,} bytes")
+        return
+    print("Loaded command modules:")
+    for module_name in commands.loaded_modules:
+        print(f"  {module_name}")
+    if not commands.loaded_modules:
+        print("  (none)")
+    print(f"Free heap: {gc.mem_free():,} bytes")
+
+def list_jobs(arguments=None):
+    if not jobs.jobs:
+        print("No background jobs.")
+        return
+    for job_id, job in jobs.jobs.items():
+        print(f"[{job_id}] Running {job[0]}")
+
+def show_history(arguments=None):
+    import lineedit
+    entries = lineedit.history_entries()
+    if not entries:
+        print("No commands in history.")
+    for number, line in entries:
+        print(f"{number:5}  {line}")
+
+def kill_job(arguments):
+    if not arguments:
+        error_flash("minor")
+        print("Usage: kill <job id>")
+        return
+    try:
+        job_id = int(arguments[0].lstrip("%"))
+    except ValueError:
+        job_id = None
+    if job_id is None or not jobs.kill(job_id):
+        error_flash("minor")
+        print(f"No such job: {arguments[0]}")
+
+# Lines of output a bg task keeps as its result
+BG_KEEP_LINES = 10
+
+# Stages that write shared state to flash (hash saves /.hashcache), so they
+# only run on core 0
+BG_REFUSED = ("hash",)
+
+def collect_lines(lines):
+    """Drain a line iterator on core 1, keeping the last BG_KEEP_LINES lines."""
+    kept = []
+    total = 0
+    for line in lines:
+        if len(kept) == BG_KEEP_LINES:
+            kept.pop(0)
+        kept.append(line)
+        total += 1
+    if total > len(kept):
+        kept.insert(0, f"({total - len(kept)} earlier lines not kept)")
+    return kept
+
+def background_task(arguments):
+    usage = "Usage: bg [<command...> | result <id> | cancel <id>]"
+    if not arguments:
+        rows = worker.tasks()
+        for task_id, label, state, ms in rows:
+            print(f"[{task_id}] {state:9} {ms:7} ms  {label}")
+        for slot, label, period_us, runs, late, error in worker.periodic_jobs():
+            status = f"failed: {error}" if error is not None else f"{runs} runs, {late} late"
+            print(f"  periodic {label:12} every {period_us} us  {status}")
+        if not rows and not worker.periodic_jobs():
+            print("Core 1 is idle.")
+        return
+    action = arguments[0]
+    if action in ("result", "cancel"):
+        try:
+            task_id = int(arguments[1])
+        except (IndexError, ValueError):
+            print(usage)
+            return
+        try:
+            if action == "cancel":
+                if not worker.cancel(task_id):
+                    error_flash("minor")
+                    print(f"Task {task_id} is not waiting to run")
+                return
+            state, value = worker.result(task_id)
+        except ValueError as e:
+            error_flash("minor")
+            print(e)
+            return
+        if state == "failed":
+            error_flash("minor")
+            print(f"Task {task_id} failed: {value}")
+        elif state != "done":
+            print(f"Task {task_id} is {state}")
+        elif isinstance(value, list):
+            for line in value:
+                print(line)
+        elif value is not None:
+            print(value)
+        return
+    # Commands are resolved here on core 0 (imports, usage errors); only
+    # the line-producing stages run on core 1
+    import pipeline
+    try:
+        stages, redirect, append = pipeline.parse(arguments)
+        if redirect is not None:
+            raise ValueError("bg keeps the output as the task result; '>' cannot be used")
+        lines = None
+        for words in stages:
+            if words[0].lower() in BG_REFUSED:
+                raise ValueError(f"{words[0].lower()} cannot run under bg; it updates its cache on flash")
+            function, stage_arguments = pipeline.lookup_stage(words)
+            lines = function(stage_arguments, lines)
+        fsutil.reserve_worker_buffer()
+        task_id = worker.submit(" ".join(arguments), collect_lines, (lines,))
+    except Exception as e:
+        error_flash("minor")
+        print(e)
+        return
+    print(f"[{task_id}] started on core 1; 'bg result {task_id}' shows the output")
+
+def show_stats(arguments=None):
+    if arguments:
+        action = arguments[0]
+        if action == "reset":
+            cmdstats.reset()
+            print("Command statistics cleared.")
+        elif action in ("on", "off"):
+            cmdstats.enabled = action == "on"
+            print(f"Command statistics {'enabled' if cmdstats.enabled else 'disabled'}.")
+        else:
+            print("Usage: stats [reset|on|off]")
+        return
+    print(f"{'command':16} {'count':>6} {'min ms':>9} {'avg ms':>9} {'max ms':>9} {'peak alloc':>11} {'GCs':>4}")
+    shown = 0
+    for name, count, fastest, average, slowest, peak, collected in cmdstats.rows():
+        print(f"{name:16} {count:6} {fastest / 1000:9.3f} {average / 1000:9.3f} "
+              f"{slowest / 1000:9.3f} {peak:11,} {collected:4}")
+        shown += 1
+    if not shown:
+        print("(no commands recorded)")
+    if cmdstats.untracked:
+        print(f"{cmdstats.untracked} runs not recorded: table full ({cmdstats.STATS_SLOTS} commands)")
+    if not cmdstats.enabled:
+        print("Recording is off ('stats on' to enable)")
+
+def show_boot_info(arguments=None):
+    if not bootlog.phases:
+        print("No boot timings recorded.")
+        return
+    print(f"Boot mode: {bootlog.mode}")
+    print(f"{'phase':12} {'at ms':>8} {'took ms':>8}")
+    start = bootlog.phases[0][1]
+    previous = start
+    for phase, ticks in bootlog.phases:
+        print(f"{phase:12} {ticks:8} {time.ticks_diff(ticks, previous):8}")
+        previous = ticks
+    print(f"Total: {time.ticks_diff(previous, start)} ms from '{bootlog.phases[0][0]}' "
+          f"to '{bootlog.phases[-1][0]}' ('at' is ms since reset)")
+
+def led_pattern(arguments):
+    usage = "Usage: led list | play <pattern> | define <name> <on_ms> <off_ms> [...]"
+    if not arguments:
+        print(usage)
+        return
+    action = arguments[0]
+    try:
+        if action == "list":
+            for name, pattern in ledpat.patterns.items():
+                steps = " ".join(str(duration * ledpat.TICK_MS) for duration in pattern)
+                print(f"  {name:10} {steps} ms")
+        elif action == "play" and len(arguments) == 2:
+            if not ledpat.play(arguments[1]):
+                print("LED pattern queue is full")
+        elif action == "define" and len(arguments) >= 4:
+            pattern = ledpat.ticks(*[int(ms) for ms in arguments[2:]])
+            if not sum(pattern):
+                raise ValueError("pattern needs at least one non-zero duration")
+            ledpat.patterns[arguments[1]] = pattern
+            print(f"Defined LED pattern '{arguments[1]}' ({len(pattern)} steps)")
+        else:
+            print(usage)
+    except ValueError as e:
+        error_flash("minor")
+        print(f"Error: {e}")
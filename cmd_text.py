@@ -0,0 +1,168 @@
+import time
+from fsutil import iter_lines, grep_lines, walk, is_directory, open_read, WALK_FILE
+from pipeline import print_lines
+
+# sort holds its whole input in RAM, so it refuses anything longer than this
+SORT_MAX_LINES = 500
+
+def input_lines(filename, source, usage):
+    """Return the lines of filename, or the piped source when no file is given."""
+    if filename is not None:
+        return file_lines(filename)
+    if source is None:
+        raise ValueError(usage)
+    return source
+
+def file_lines(filename):
+    with open_read(filename) as file:
+        for line in iter_lines(file):
+            yield line
+
+def split_flags(arguments, allowed):
+    """Split arguments into a set of single-letter flags and the remaining words."""
+    flags = set()
+    words = []
+    for argument in arguments:
+        if argument.startswith("-") and len(argument) > 1 and not words:
+            for flag in argument[1:]:
+                if flag not in allowed:
+                    raise ValueError(f"Invalid option: -{flag}")
+                flags.add(flag)
+        else:
+            words.append(argument)
+    return flags, words
+
+def grep_source(source, pattern, flags):
+    """Yield (line number, line) for matching lines of a piped line iterator."""
+    ignore_case = "i" in flags
+    if ignore_case:
+        pattern = pattern.lower()
+    invert = "v" in flags
+    number = 0
+    for line in source:
+        number += 1
+        if (pattern in (line.lower() if ignore_case else line)) != invert:
+            yield number, line
+
+def grep_file(path, pattern, flags, prefix):
+    """Yield grep output lines for one file, scanned through the fixed copy buffer."""
+    ignore_case = "i" in flags
+    if ignore_case:
+        pattern = pattern.lower()
+    with open_read(path) as file:
+        yield from format_matches(grep_lines(file, pattern.encode(), ignore_case, "v" in flags),
+                                  flags, prefix)
+
+def format_matches(matches, flags, prefix):
+    if "c" in flags:
+        count = 0
+        for number, line in matches:
+            count += 1
+        if count or not prefix:
+            yield f"{prefix}{count}"
+        return
+    for number, line in matches:
+        yield f"{prefix}{number}:{line}" if "n" in flags else prefix + line
+
+def iter_grep(arguments, source=None):
+    """Yield the lines containing a pattern (plain substring match).
+
+    With -r, every file below the given directory is searched and each
+    line is prefixed with its path.
+    """
+    usage = "Usage: grep [-r] [-v] [-i] [-c] [-n] <pattern> [path]"
+    flags, words = split_flags(arguments, "rvicn")
+    if not words:
+        raise ValueError(usage)
+    pattern = words[0]
+    if len(words) < 2:
+        if source is None:
+            raise ValueError(usage)
+        yield from format_matches(grep_source(source, pattern, flags), flags, "")
+        return
+    path = words[1]
+    if "r" not in flags or not is_directory(path):
+        yield from grep_file(path, pattern, flags, "")
+        return
+    start = time.ticks_ms()
+    files = 0
+    scanned = 0
+    for child, kind, size in walk(path):
+        if kind == WALK_FILE:
+            files += 1
+            scanned += size
+            yield from grep_file(child, pattern, flags, child + ":")
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    print(f"Searched {files} files ({scanned:,} bytes) in {elapsed} ms")
+
+def iter_wc(arguments, source=None):
+    """Yield line, word and byte counts of a file or piped input."""
+    usage = "Usage: wc [-l] [-w] [-c] [filename]"
+    flags, words = split_flags(arguments, "lwc")
+    filename = words[0] if words else None
+    lines = 0
+    word_count = 0
+    characters = 0
+    for line in input_lines(filename, source, usage):
+        lines += 1
+        word_count += len(line.split())
+        characters += len(line) + 1
+    counts = []
+    if not flags or "l" in flags:
+        counts.append(f"{lines:8}")
+    if not flags or "w" in flags:
+        counts.append(f"{word_count:8}")
+    if not flags or "c" in flags:
+        counts.append(f"{characters:8}")
+    if filename:
+        counts.append(filename)
+    yield " ".join(counts)
+
+def numeric_key(line):
+    """Sort key for sort -n: the leading number of a line, non-numbers first."""
+    text = line.strip()
+    end = 0
+    while end < len(text) and (text[end] in "0123456789." or (end == 0 and text[end] in "+-")):
+        end += 1
+    try:
+        return float(text[:end])
+    except ValueError:
+        return float("-inf")
+
+def iter_sort(arguments, source=None):
+    """Yield the input lines sorted. Input is limited to SORT_MAX_LINES lines.
+
+    -k N sorts on the Nth whitespace-separated field instead of the whole line.
+    """
+    usage = "Usage: sort [-n] [-r] [-k field] [filename]"
+    field = 0
+    if "-k" in arguments:
+        index = arguments.index("-k")
+        if index + 1 == len(arguments) or not arguments[index + 1].isdigit() or arguments[index + 1] == "0":
+            raise ValueError(usage)
+        field = int(arguments[index + 1])
+        arguments = arguments[:index] + arguments[index + 2:]
+    flags, words = split_flags(arguments, "nr")
+    lines = []
+    for line in input_lines(words[0] if words else None, source, usage):
+        if len(lines) >= SORT_MAX_LINES:
+            raise ValueError(f"sort input exceeds {SORT_MAX_LINES} lines")
+        lines.append(line)
+    def field_of(line):
+        fields = line.split()
+        return fields[field - 1] if len(fields) >= field else ""
+    if "n" in flags:
+        key = (lambda line: numeric_key(field_of(line))) if field else numeric_key
+    else:
+        key = field_of if field else None
+    lines.sort(key=key, reverse="r" in flags)
+    yield from lines
+
+def grep(arguments):
+    print_lines(iter_grep, arguments)
+
+def wc(arguments):
+    print_lines(iter_wc, arguments)
+
+def sort(arguments):
+    print_lines(iter_sort, arguments)
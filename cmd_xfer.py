@@ -0,0 +1,76 @@
+import sys
+import time
+import select
+import micropython
+import xfer
+import shellenv
+import dircache
+from shellenv import error_flash
+from fsutil import normpath
+
+class ConsoleLink:
+    """xfer link over the USB console: raw bytes through stdin/stdout buffers."""
+
+    def __init__(self):
+        self.stdin = sys.stdin.buffer
+        self.stdout = sys.stdout.buffer
+        self.poller = select.poll()
+        self.poller.register(sys.stdin, select.POLLIN)
+
+    def wait(self, timeout_ms):
+        return bool(self.poller.poll(timeout_ms))
+
+    def readinto(self, buffer):
+        self.stdin.readinto(buffer)
+
+    def write(self, data):
+        self.stdout.write(data)
+
+    def drain(self):
+        """Discard whatever the other side sent after the transfer ended."""
+        byte = bytearray(1)
+        while self.wait(100):
+            self.stdin.readinto(byte)
+
+def run_transfer(transfer, path, verb):
+    """Run one transfer with Ctrl-C disabled, since frames may contain 0x03.
+
+    A frame that stops arriving halfway is completed by any further input
+    (the host script sends padding when it restarts, or press keys until
+    the prompt returns); it then fails its CRC and is discarded.
+    """
+    link = ConsoleLink()
+    start = time.ticks_ms()
+    micropython.kbd_intr(-1)
+    try:
+        count, resumed = transfer(link, path)
+    except (OSError, RuntimeError) as e:
+        link.drain()
+        error_flash("minor")
+        print(f"\nTransfer failed: {e}")
+        return
+    finally:
+        micropython.kbd_intr(3)
+    link.drain()
+    dircache.invalidate(normpath(path, shellenv.current_directory))
+    elapsed = max(time.ticks_diff(time.ticks_ms(), start), 1)
+    note = f", resumed at byte {resumed:,}" if resumed else ""
+    print(f"\n{verb} {count:,} bytes of '{path}' in {elapsed} ms ({count * 1000 // elapsed:,} bytes/s{note})")
+
+def send_file(arguments):
+    if len(arguments) != 1:
+        print("Usage: send <file>")
+        print("Run 'python tools/pico_xfer.py <port> get <file>' on the host instead of typing this")
+        return
+    if xfer.file_size(arguments[0]) < 0:
+        error_flash("minor")
+        print(f"File '{arguments[0]}' not found")
+        return
+    run_transfer(lambda link, path: xfer.send(link, path, announce=True), arguments[0], "Sent")
+
+def receive_file(arguments):
+    if len(arguments) != 1:
+        print("Usage: recv <file>")
+        print("Run 'python tools/pico_xfer.py <port> put <file>' on the host instead of typing this")
+        return
+    run_transfer(xfer.receive, arguments[0], "Received")
@@ -0,0 +1,79 @@
+import time
+import gc
+from array import array
+
+# Per-command cost table. Slots are allocated once, so recording a command
+# never allocates; commands seen after the table fills are only counted in
+# `untracked`.
+STATS_SLOTS = 32
+
+enabled = True
+names = [None] * STATS_SLOTS
+counts = array('I', [0] * STATS_SLOTS)
+min_us = array('I', [0] * STATS_SLOTS)
+max_us = array('I', [0] * STATS_SLOTS)
+total_us = array('I', [0] * STATS_SLOTS)
+peak_alloc = array('I', [0] * STATS_SLOTS)
+collections = array('I', [0] * STATS_SLOTS)
+untracked = 0
+
+def start():
+    """Return a measurement token to pass to finish() once the command returns."""
+    return time.ticks_us(), gc.mem_alloc()
+
+def finish(started):
+    """Return (elapsed_us, allocated_bytes, collections) since start().
+
+    MicroPython does not count garbage collections, so a collection is
+    inferred when the heap shrank while the command ran. This can only tell
+    that at least one collection happened, and allocated_bytes then
+    undercounts what the command allocated.
+    """
+    elapsed = time.ticks_diff(time.ticks_us(), started[0])
+    delta = gc.mem_alloc() - started[1]
+    if delta < 0:
+        return elapsed, 0, 1
+    return elapsed, delta, 0
+
+def record(name, elapsed, allocated, collected):
+    """Add one run of a command to the stats table."""
+    global untracked
+    slot = 0
+    while slot < STATS_SLOTS and names[slot] is not None and names[slot] != name:
+        slot += 1
+    if slot == STATS_SLOTS:
+        untracked += 1
+        return
+    if names[slot] is None:
+        names[slot] = name
+        min_us[slot] = elapsed
+    counts[slot] += 1
+    if elapsed < min_us[slot]:
+        min_us[slot] = elapsed
+    if elapsed > max_us[slot]:
+        max_us[slot] = elapsed
+    # Saturate rather than wrap the 32-bit total (about 71 minutes)
+    total_us[slot] = min(total_us[slot] + elapsed, 0xFFFFFFFF)
+    if allocated > peak_alloc[slot]:
+        peak_alloc[slot] = allocated
+    collections[slot] += collected
+
+def reset():
+    global untracked
+    for slot in range(STATS_SLOTS):
+        names[slot] = None
+        counts[slot] = 0
+        min_us[slot] = 0
+        max_us[slot] = 0
+        total_us[slot] = 0
+        peak_alloc[slot] = 0
+        collections[slot] = 0
+    untracked = 0
+
+def rows():
+    """Yield (name, count, min_us, avg_us, max_us, peak_alloc, collections) per command."""
+    for slot in range(STATS_SLOTS):
+        if names[slot] is None:
+            break
+        yield (names[slot], counts[slot], min_us[slot], total_us[slot] // counts[slot],
+               max_us[slot], peak_alloc[slot], collections[slot])
@@ -0,0 +1,147 @@
+import uos
+import gc
+import sys
+import struct
+
+try:
+    import marshal
+except ImportError:
+    marshal = None
+
+# Precompiled scripts: <dir>/__mpy__/<name>.mpy, built on the host with
+# mpy-cross, is imported instead of compiling <dir>/<name>.py while it is at
+# least as new as the source. It lives in its own directory because import
+# prefers a .py to a .mpy of the same name. This works on stock firmware.
+MPY_DIR = "__mpy__"
+MPY_SUFFIX = ".mpy"
+
+# Cached bytecode lives next to each script as <name>.mpc: a 12-byte header
+# (magic, source size, source mtime) followed by the marshalled code object.
+# This needs firmware whose marshal can dump code objects (stock rp2 builds
+# cannot); without it, scripts with no .mpy compile from source every run.
+CACHE_SUFFIX = ".mpc"
+CACHE_MAGIC = b"AGC1"
+HEADER_FORMAT = "<4sII"
+HEADER_SIZE = 12
+
+# None until the first run checks what marshal can do
+supported = None
+
+def caching_supported():
+    """Return True if this firmware can marshal code objects (checked once)."""
+    global supported
+    if supported is None:
+        try:
+            marshal.dumps(compile("0", "<probe>", "exec"))
+            supported = True
+        except Exception:
+            supported = False
+    return supported
+
+def mpy_path(script_name):
+    """Return where a script's precompiled .mpy is looked for."""
+    directory, _, name = script_name.rpartition("/")
+    if name.endswith(".py"):
+        name = name[:-3]
+    return f"{directory + '/' if directory else ''}{MPY_DIR}/{name}{MPY_SUFFIX}"
+
+def find_mpy(script_name):
+    """Return the script's .mpy path if it is usable, or None.
+
+    It is skipped when older than the source, or when a module of the same
+    name is already loaded (importing would reuse or replace that module).
+    """
+    path = mpy_path(script_name)
+    module = path[path.rfind("/") + 1:-len(MPY_SUFFIX)]
+    if module in sys.modules:
+        return None
+    try:
+        built = uos.stat(path)[8]
+    except OSError:
+        return None
+    try:
+        if uos.stat(script_name)[8] > built:
+            return None
+    except OSError:
+        pass
+    return path
+
+def run_mpy(path):
+    """Run a .mpy by importing it; it is dropped from sys.modules again so
+    the next run executes it afresh. It runs as a module, so code under
+    'if __name__ == "__main__"' is skipped."""
+    directory, _, name = path.rpartition("/")
+    module = name[:-len(MPY_SUFFIX)]
+    sys.path.insert(0, directory)
+    try:
+        __import__(module)
+    finally:
+        sys.path.remove(directory)
+        sys.modules.pop(module, None)
+
+def cache_path(script_name):
+    """Return the cache file used for a script."""
+    if script_name.endswith(".py"):
+        return script_name[:-3] + CACHE_SUFFIX
+    return script_name + CACHE_SUFFIX
+
+def source_stamp(script_name):
+    """Return the (size, mtime) pair a cache entry is keyed on."""
+    stats = uos.stat(script_name)
+    return stats[6], stats[8] & 0xFFFFFFFF
+
+def compile_script(script_name):
+    """Compile a script from source."""
+    with open(script_name, 'r') as script_file:
+        source = script_file.read()
+    code = compile(source, script_name, "exec")
+    source = None
+    gc.collect()
+    return code
+
+def read_cache(script_name, stamp):
+    """Return the cached code object, or None if missing or stale."""
+    try:
+        with open(cache_path(script_name), 'rb') as cache_file:
+            header = cache_file.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE:
+                return None
+            magic, size, mtime = struct.unpack(HEADER_FORMAT, header)
+            if magic != CACHE_MAGIC or (size, mtime) != stamp:
+                return None
+            return marshal.loads(cache_file.read())
+    except (OSError, ValueError, EOFError):
+        return None
+
+def write_cache(script_name, stamp, code):
+    """Store a compiled code object. Returns True on success."""
+    path = cache_path(script_name)
+    try:
+        data = marshal.dumps(code)
+        with open(path, 'wb') as cache_file:
+            cache_file.write(struct.pack(HEADER_FORMAT, CACHE_MAGIC, stamp[0], stamp[1]))
+            cache_file.write(data)
+        return True
+    except Exception as e:
+        print(f"Warning: could not write bytecode cache '{path}': {e}")
+        try:
+            uos.remove(path)
+        except OSError:
+            pass
+        return False
+
+def load_code(script_name, use_cache=True):
+    """Return (code, from_cache) for a script.
+
+    A fresh cache entry is loaded without touching the source; a missing or
+    stale one is rebuilt from source and written back for the next run.
+    """
+    if not use_cache or not caching_supported():
+        return compile_script(script_name), False
+    stamp = source_stamp(script_name)
+    code = read_cache(script_name, stamp)
+    if code is not None:
+        return code, True
+    code = compile_script(script_name)
+    write_cache(script_name, stamp, code)
+    return code, False
@@ -0,0 +1,161 @@
+import uos
+import sys
+import gc
+
+# Command registry. Each entry names the module and function implementing a
+# command; the module is imported the first time the command is used, so a
+# session only pays RAM for the commands it actually runs. Entries may also
+# be plain callables (used for the few commands built into the shell core).
+# Command modules must not keep state of their own (use shellenv for that),
+# because they can be dropped from sys.modules under memory pressure.
+command_functions = {
+    "ls": ("cmd_fs", "print_directory_contents"),
+    "cd": ("cmd_fs", "change_directory"),
+    "pwd": ("cmd_fs", "print_working_directory"),
+    "delete": ("cmd_fs", "delete_file"),
+    "del": ("cmd_fs", "delete_file"),
+    "mkdir": ("cmd_fs", "make_directory"),
+    "rmdir": ("cmd_fs", "remove_directory"),
+    "help": ("cmd_help", "microshell_help"),
+    "notepad": ("cmd_notepad", "notepad"),
+    "cp": ("cmd_fs", "copy_file"),
+    "mv": ("cmd_fs", "move_file"),
+    "send": ("cmd_xfer", "send_file"),
+    "recv": ("cmd_xfer", "receive_file"),
+    "gzip": ("cmd_archive", "gzip_file"),
+    "gunzip": ("cmd_archive", "gunzip_file"),
+    "logrotate": ("cmd_archive", "log_rotate"),
+    "run": ("cmd_sys", "run_script"),
+    "cat": ("cmd_fs", "cat_file"),
+    "head": ("cmd_fs", "head_file"),
+    "tail": ("cmd_fs", "tail_file"),
+    "memory": ("cmd_sys", "display_memory_usage"),
+    "modules": ("cmd_sys", "list_modules"),
+    "reboot": ("cmd_sys", "reboot_pico"),
+    "temp": ("cmd_sys", "check_temperature"),
+    "jobs": ("cmd_sys", "list_jobs"),
+    "kill": ("cmd_sys", "kill_job"),
+    "bg": ("cmd_sys", "background_task"),
+    "history": ("cmd_sys", "show_history"),
+    "stats": ("cmd_sys", "show_stats"),
+    "bootinfo": ("cmd_sys", "show_boot_info"),
+    "led": ("cmd_sys", "led_pattern"),
+    "device": {
+        "register": ("cmd_device", "register_device"),
+        "control": ("cmd_device", "control_device"),
+        "read": ("cmd_device", "read_device"),
+        "list": ("cmd_device", "list_devices"),
+        "blink": ("cmd_device", "blink_device"),
+        "sample": ("cmd_device", "sample_device"),
+        "group": ("cmd_device", "group_device"),
+        "wave": ("cmd_device", "wave_device"),
+        "freq": ("cmd_device", "freq_device"),
+        "save": ("cmd_device", "save_devices"),
+        "load": ("cmd_device", "load_devices"),
+        "watch": ("cmd_device", "watch_device"),
+        "unwatch": ("cmd_device", "unwatch_device"),
+        "events": ("cmd_device", "events_device"),
+        "rate": ("cmd_device", "rate_device"),
+        "log": ("cmd_device", "log_device")
+    },
+    "log": {
+        "export": ("cmd_device", "export_log")
+    },
+    "grep": ("cmd_text", "grep"),
+    "wc": ("cmd_text", "wc"),
+    "sort": ("cmd_text", "sort"),
+    "find": ("cmd_search", "find_files"),
+    "du": ("cmd_search", "disk_usage"),
+    "hash": ("cmd_search", "hash_files")
+}
+
+# Commands usable as pipeline stages ('|', '>' and '>>'). Entries have the
+# same shape as command_functions but name generator functions called as
+# function(arguments, source), where source is the previous stage's line
+# iterator (None for the first stage). Each yields output lines one at a time.
+pipe_functions = {
+    "ls": ("cmd_fs", "iter_ls"),
+    "cat": ("cmd_fs", "iter_cat"),
+    "head": ("cmd_fs", "iter_head"),
+    "tail": ("cmd_fs", "iter_tail"),
+    "grep": ("cmd_text", "iter_grep"),
+    "wc": ("cmd_text", "iter_wc"),
+    "sort": ("cmd_text", "iter_sort"),
+    "find": ("cmd_search", "iter_find"),
+    "du": ("cmd_search", "iter_du"),
+    "hash": ("cmd_search", "iter_hash"),
+    "device": {
+        "read": ("cmd_device", "iter_read")
+    },
+    "log": {
+        "export": ("cmd_device", "iter_export")
+    }
+}
+
+# Directory scanned for user command plugins. Each <name>.py (or .mpy) file
+# becomes a command <name> that calls the plugin's main(arguments).
+PLUGIN_DIR = "/plugins"
+
+# Loaded command modules are dropped when free heap falls below this
+LOW_MEMORY_THRESHOLD = 16 * 1024
+
+# Names of command modules imported through the registry, in load order
+loaded_modules = []
+
+def resolve(entry):
+    """Return the function for a registry entry, importing its module if needed."""
+    if not isinstance(entry, tuple):
+        return entry
+    module_name, function_name = entry
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = __import__(module_name)
+        loaded_modules.append(module_name)
+    return getattr(module, function_name)
+
+def unload_modules(keep=()):
+    """Drop loaded command modules from sys.modules. Returns the count unloaded."""
+    unloaded = 0
+    for module_name in loaded_modules[:]:
+        if module_name in keep:
+            continue
+        loaded_modules.remove(module_name)
+        if module_name in sys.modules:
+            del sys.modules[module_name]
+            unloaded += 1
+    gc.collect()
+    return unloaded
+
+def check_memory_pressure():
+    """Unload command modules if the heap is running low."""
+    if gc.mem_free() < LOW_MEMORY_THRESHOLD:
+        gc.collect()
+        if gc.mem_free() < LOW_MEMORY_THRESHOLD:
+            return unload_modules()
+    return 0
+
+def discover_plugins(directory=PLUGIN_DIR):
+    """Register plugin commands found in directory without importing them."""
+    try:
+        entries = uos.ilistdir(directory)
+    except OSError:
+        return 0
+    if directory not in sys.path:
+        sys.path.append(directory)
+    found = 0
+    for entry in entries:
+        name = entry[0]
+        if entry[1] == 0x4000 or name.startswith("_"):
+            continue
+        if name.endswith(".py"):
+            module_name = name[:-3]
+        elif name.endswith(".mpy"):
+            module_name = name[:-4]
+        else:
+            continue
+        if module_name in command_functions:
+            print(f"Plugin '{name}' ignored: command '{module_name}' already exists")
+            continue
+        command_functions[module_name] = (module_name, "main")
+        found += 1
+    return found
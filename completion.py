@@ -0,0 +1,59 @@
+import shellenv
+import dircache
+from commands import command_functions
+from fsutil import normpath
+
+# Tab completion for the prompt. Command names come from a sorted index of
+# command_functions (rebuilt when plugins add commands), searched by binary
+# search; subcommands of grouped commands such as device, registered device
+# names and paths (through dircache) complete the later words.
+command_index = []
+
+def prefixed(names, prefix):
+    """Return the names in a sorted list that start with prefix."""
+    low = 0
+    high = len(names)
+    while low < high:
+        middle = (low + high) // 2
+        if names[middle] < prefix:
+            low = middle + 1
+        else:
+            high = middle
+    found = []
+    while low < len(names) and names[low].startswith(prefix):
+        found.append(names[low])
+        low += 1
+    return found
+
+def command_names(prefix):
+    global command_index
+    if len(command_index) != len(command_functions):
+        command_index = sorted(command_functions)
+    return [name + " " for name in prefixed(command_index, prefix)]
+
+def path_names(word):
+    split = word.rfind("/") + 1
+    directory = normpath(word[:split] or ".", shellenv.current_directory)
+    try:
+        entries = dircache.matches(directory, word[split:])
+    except OSError:
+        return []
+    return [word[:split] + name + ("/" if is_dir else " ") for name, is_dir in entries]
+
+def complete(line):
+    """Return (word being completed, candidate replacements) for the end of line."""
+    word = line[line.rfind(" ") + 1:]
+    previous = line[:len(line) - len(word)].split()
+    # Complete each stage of a pipeline like a command line of its own
+    while "|" in previous:
+        previous = previous[previous.index("|") + 1:]
+    if not previous:
+        return word, command_names(word)
+    entry = command_functions.get(previous[0].lower())
+    if isinstance(entry, dict) and len(previous) == 1:
+        return word, [name + " " for name in sorted(entry) if name.startswith(word)]
+    if previous[0].lower() == "device" and len(previous) == 2 and previous[1] != "register":
+        devman = shellenv.devman
+        names = sorted(list(devman.specs) + list(devman.groups))
+        return word, [name + " " for name in prefixed(names, word)]
+    return word, path_names(word)
@@ -0,0 +1,139 @@
+import uos
+import time
+import struct
+import machine
+import micropython
+
+# Log file layout: a header (magic, version, channel count, record size,
+# interval, block size, start time) and an 8-byte name per channel, then
+# fixed-size records (ms since start as u32, then one u16 per channel).
+# The file is written in whole filesystem blocks; records never straddle a
+# block boundary, so each block holds (block size - start) // record size
+# records, where start is the header length for the first block and 0 after.
+LOG_MAGIC = b"AGL1"
+LOG_VERSION = 1
+LOG_HEADER = "<4sBBHIII"
+LOG_HEADER_SIZE = struct.calcsize(LOG_HEADER)
+LOG_NAME_SIZE = 8
+
+def block_size_for(path):
+    """Return the filesystem block size to buffer for."""
+    directory = path.rsplit("/", 1)[0] if "/" in path else ""
+    return uos.statvfs(directory or "/")[0]
+
+class DataLogger:
+    """Samples channels from a Timer into block-sized RAM buffers.
+
+    Two buffers alternate: while one fills, the other is written out via
+    micropython.schedule. The per-record path only calls the channel readers
+    and struct.pack_into, so it allocates nothing. With use_timer=False no
+    Timer is started and the owner calls sample() itself (the core 1
+    worker does); blocks are still written through micropython.schedule,
+    so flash is only ever written from the main thread.
+    """
+    def __init__(self, path, names, readers, interval_ms, block_size, use_timer=True):
+        self.path = path
+        self.names = names
+        self.readers = readers
+        self.interval_ms = interval_ms
+        self.block_size = block_size
+        self.record_size = 4 + 2 * len(readers)
+        header_size = LOG_HEADER_SIZE + LOG_NAME_SIZE * len(names)
+        if header_size + self.record_size > block_size:
+            raise ValueError("Too many channels for one filesystem block")
+        self.buffers = [bytearray(block_size), bytearray(block_size)]
+        self.active = 0
+        self.pending = -1
+        self.records = 0
+        self.blocks = 0
+        self.dropped = 0
+        self.elapsed = 0
+        buf = self.buffers[0]
+        struct.pack_into(LOG_HEADER, buf, 0, LOG_MAGIC, LOG_VERSION, len(names),
+                         self.record_size, interval_ms, block_size, int(time.time()))
+        offset = LOG_HEADER_SIZE
+        for name in names:
+            buf[offset:offset + LOG_NAME_SIZE] = (name.encode() + bytes(LOG_NAME_SIZE))[:LOG_NAME_SIZE]
+            offset += LOG_NAME_SIZE
+        self.offset = offset
+        self.file = open(path, "wb")
+        self.last = time.ticks_ms()
+        self.sample_callback = self.sample
+        self.flush_callback = self.flush
+        self.timer = None
+        if use_timer:
+            self.timer = machine.Timer()
+            self.timer.init(period=interval_ms, mode=machine.Timer.PERIODIC, callback=self.sample_callback)
+
+    def sample(self, timer):
+        if self.offset + self.record_size > self.block_size:
+            if self.pending >= 0:
+                # Flash has not caught up; drop rather than block
+                self.dropped += 1
+                return
+            self.pending = self.active
+            self.active ^= 1
+            self.offset = 0
+            micropython.schedule(self.flush_callback, self.pending)
+        now = time.ticks_ms()
+        self.elapsed += time.ticks_diff(now, self.last)
+        self.last = now
+        buf = self.buffers[self.active]
+        offset = self.offset
+        struct.pack_into("<I", buf, offset, self.elapsed)
+        offset += 4
+        for read in self.readers:
+            struct.pack_into("<H", buf, offset, read())
+            offset += 2
+        self.offset = offset
+        self.records += 1
+
+    def flush(self, index):
+        self.file.write(self.buffers[index])
+        self.blocks += 1
+        self.pending = -1
+
+    def stop(self):
+        """Stop sampling and write out everything still buffered."""
+        if self.timer is not None:
+            self.timer.deinit()
+        if self.pending >= 0:
+            self.flush(self.pending)
+        if self.offset:
+            self.file.write(memoryview(self.buffers[self.active])[:self.offset])
+        self.file.close()
+        self.buffers = None
+
+def read_header(file):
+    """Return (names, record size, interval ms, block size, start time)."""
+    header = file.read(LOG_HEADER_SIZE)
+    if len(header) < LOG_HEADER_SIZE:
+        raise ValueError("Not a data log")
+    magic, version, channels, record_size, interval_ms, block_size, start = struct.unpack(LOG_HEADER, header)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError("Not a data log")
+    names = []
+    for _ in range(channels):
+        names.append(str(file.read(LOG_NAME_SIZE), "utf-8").rstrip("\0"))
+    return names, record_size, interval_ms, block_size, start
+
+def iter_csv(path):
+    """Yield a data log as CSV lines, one block in RAM at a time."""
+    with open(path, "rb") as file:
+        names, record_size, interval_ms, block_size, start = read_header(file)
+        values_format = "<" + "H" * len(names)
+        yield "ms," + ",".join(names)
+        file.seek(0)
+        buffer = bytearray(block_size)
+        offset = LOG_HEADER_SIZE + LOG_NAME_SIZE * len(names)
+        while True:
+            count = file.readinto(buffer)
+            if not count:
+                break
+            limit = min(count, offset + (block_size - offset) // record_size * record_size)
+            while offset + record_size <= limit:
+                stamp = struct.unpack_from("<I", buffer, offset)[0]
+                values = struct.unpack_from(values_format, buffer, offset + 4)
+                yield str(stamp) + "," + ",".join([str(value) for value in values])
+                offset += record_size
+            offset = 0
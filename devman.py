@@ -1,23 +1,315 @@
 import machine
+import micropython
+import uos
 import time
+import struct
+import gc
+import math
+import worker
+from array import array
+
+# RP2040 SIO registers, used to read or update a whole pin group in one access
+SIO_BASE = 0xD0000000
+GPIO_IN = SIO_BASE + 0x004
+GPIO_OUT = SIO_BASE + 0x010
+GPIO_OUT_XOR = SIO_BASE + 0x01C
+
+# Groups of up to this many non-contiguous pins get a value-to-mask lookup table
+GROUP_LUT_MAX_PINS = 8
+
+# Longest waveform lookup table, and the fastest rate the Timer steps through it
+WAVE_TABLE_MAX = 256
+WAVE_STEP_MAX_HZ = 1000
+WAVE_SHAPES = ("sine", "triangle", "ramp", "square")
+
+# Edge timestamps kept per watched pin, and the IRQ trigger for each edge name
+WATCH_BUFFER_SIZE = 64
+WATCH_TRIGGERS = {
+    "rising": machine.Pin.IRQ_RISING,
+    "falling": machine.Pin.IRQ_FALLING,
+    "both": machine.Pin.IRQ_RISING | machine.Pin.IRQ_FALLING
+}
+
+# Saved device registry: a header (magic, record count) followed by one
+# fixed-size record per device (mode, pin or pin count, pull, value, PWM
+# frequency, name length), then the name and, for groups, the pin numbers
+REGISTRY_FILE = "/devices.bin"
+REGISTRY_MAGIC = b"AGD1"
+REGISTRY_HEADER = "<4sB"
+REGISTRY_RECORD = "<BBBIIB"
+REGISTRY_MODES = ("out", "in", "adc", "pwm", "group_out", "group_in")
+REGISTRY_PULLS = (None, "up", "down")
+
+# Default capacity (in samples, across all channels) of the sampling ring buffer
+SAMPLE_BUFFER_SIZE = 4096
+
+@micropython.native
+def capture_samples(sources, channels, buf, capacity, period_us, count):
+    """Fill buf with count interleaved scans of sources, one scan per period.
+
+    buf is used as a ring: once capacity samples are stored, the oldest are
+    overwritten. Returns (next write index, number of late scans).
+    """
+    ticks_us = time.ticks_us
+    ticks_add = time.ticks_add
+    ticks_diff = time.ticks_diff
+    index = 0
+    late = 0
+    next_tick = ticks_us()
+    for _ in range(count):
+        for channel in range(channels):
+            buf[index] = sources[channel].read_u16()
+            index += 1
+            if index >= capacity:
+                index = 0
+        next_tick = ticks_add(next_tick, period_us)
+        if ticks_diff(next_tick, ticks_us()) < 0:
+            late += 1
+            next_tick = ticks_us()
+        while ticks_diff(next_tick, ticks_us()) > 0:
+            pass
+    return index, late
+
+@micropython.native
+def summarize_samples(buf, start, count, step, capacity):
+    """Return (min, max, sum, sum of squares of value >> 4) for one channel.
+
+    The sums are kept as 24-bit split accumulators so no large integers are
+    allocated while scanning; they are returned as (high, low) pairs.
+    """
+    low = 65535
+    high = 0
+    sum_hi = 0
+    sum_lo = 0
+    sq_hi = 0
+    sq_lo = 0
+    index = start
+    for _ in range(count):
+        value = buf[index]
+        if value < low:
+            low = value
+        if value > high:
+            high = value
+        sum_lo += value
+        if sum_lo >= 0x1000000:
+            sum_hi += 1
+            sum_lo -= 0x1000000
+        value >>= 4
+        sq_lo += value * value
+        if sq_lo >= 0x1000000:
+            sq_hi += sq_lo >> 24
+            sq_lo &= 0xFFFFFF
+        index += step
+        if index >= capacity:
+            index -= capacity
+    return low, high, sum_hi, sum_lo, sq_hi, sq_lo
+
+def build_wave_table(shape, length, amplitude=1.0):
+    """Precompute one period of a waveform as PWM duty values (0-65535)."""
+    if shape not in WAVE_SHAPES:
+        raise ValueError(f"Unknown wave shape '{shape}' (use {', '.join(WAVE_SHAPES)})")
+    table = array('H', bytearray(2 * length))
+    scale = 65535 * amplitude
+    half = length / 2
+    for i in range(length):
+        if shape == "sine":
+            level = (1 - math.cos(2 * math.pi * i / length)) / 2
+        elif shape == "triangle":
+            level = i / half if i < half else (length - i) / half
+        elif shape == "ramp":
+            level = i / length
+        else:
+            level = 1 if i < half else 0
+        table[i] = int(level * scale)
+    return table
+
+def wave_table_length(freq):
+    """Table length that keeps the Timer at or below WAVE_STEP_MAX_HZ."""
+    return max(2, min(WAVE_TABLE_MAX, int(WAVE_STEP_MAX_HZ / freq)))
+
+class Waveform:
+    """Steps a PWM output through a precomputed duty table from a Timer.
+
+    The Timer callback only indexes the table and sets the duty, so it
+    allocates nothing; the bound method is created once, up front. With
+    use_timer=False the core 1 worker calls step() instead.
+    """
+    def __init__(self, pwm, table, freq, use_timer=True):
+        self.pwm = pwm
+        self.table = table
+        self.length = len(table)
+        self.index = 0
+        self.freq = freq
+        self.step_hz = freq * self.length
+        self.callback = self.step
+        self.timer = None
+        self.worker_slot = None
+        if use_timer:
+            self.timer = machine.Timer()
+            self.timer.init(freq=self.step_hz, mode=machine.Timer.PERIODIC, callback=self.callback)
+
+    def step(self, timer):
+        self.pwm.duty_u16(self.table[self.index])
+        self.index += 1
+        if self.index >= self.length:
+            self.index = 0
+
+    def stop(self):
+        if self.worker_slot is not None:
+            worker.remove_periodic(self.worker_slot)
+            self.worker_slot = None
+        if self.timer is not None:
+            self.timer.deinit()
+
+class PinWatch:
+    """Counts edges on a pin from its IRQ and logs their ticks_us times.
+
+    The handler only does small-integer arithmetic and array stores, so it
+    allocates nothing and runs as a hard IRQ. Follow-up work goes to an
+    optional callback that is run later through micropython.schedule.
+    """
+    def __init__(self, pin, edge, debounce_ms=0, callback=None, size=WATCH_BUFFER_SIZE):
+        self.pin = pin
+        self.edge = edge
+        self.debounce_us = debounce_ms * 1000
+        self.times = array('I', bytearray(4 * size))
+        self.size = size
+        self.head = 0
+        self.count = 0
+        self.bounces = 0
+        self.last = 0
+        self.callback = callback
+        self.pending = False
+        # Bound once here; creating them inside the IRQ would allocate
+        self.handler = self.irq_handler
+        self.deferred = self.run_callback
+        pin.irq(handler=self.handler, trigger=WATCH_TRIGGERS[edge], hard=True)
+
+    def irq_handler(self, pin):
+        now = time.ticks_us()
+        if self.count and time.ticks_diff(now, self.last) < self.debounce_us:
+            self.bounces += 1
+            return
+        self.last = now
+        self.times[self.head] = now
+        self.head += 1
+        if self.head >= self.size:
+            self.head = 0
+        self.count += 1
+        # Only one callback is queued at a time, so the schedule queue can't overflow
+        if self.callback is not None and not self.pending:
+            self.pending = True
+            micropython.schedule(self.deferred, self.count)
+
+    def run_callback(self, count):
+        self.pending = False
+        self.callback(count)
+
+    def snapshot(self):
+        """Return (count, bounces, head) read atomically with IRQs disabled."""
+        state = machine.disable_irq()
+        result = (self.count, self.bounces, self.head)
+        machine.enable_irq(state)
+        return result
+
+    def recent(self, limit):
+        """Return up to limit most recent edge times, oldest first."""
+        count, bounces, head = self.snapshot()
+        stored = min(count, self.size, limit)
+        return [self.times[(head - stored + i) % self.size] for i in range(stored)]
+
+    def stop(self):
+        self.pin.irq(handler=None)
+
+class PinGroup:
+    """A set of GPIOs read or written as one value through the SIO registers.
+
+    The first pin is bit 0 of the value. Writes XOR the changed bits into
+    GPIO_OUT with a single register store, so every pin switches at once.
+    """
+    def __init__(self, pin_nums, mode="out"):
+        self.pin_nums = tuple(pin_nums)
+        self.mode = mode
+        self.mask = 0
+        for pin_num in self.pin_nums:
+            self.mask |= 1 << pin_num
+        # Pins in ascending, consecutive order map to a plain shift
+        first = self.pin_nums[0]
+        self.shift = first if self.pin_nums == tuple(range(first, first + len(self.pin_nums))) else -1
+        self.lut = None
+        if self.shift < 0 and len(self.pin_nums) <= GROUP_LUT_MAX_PINS:
+            self.lut = array('I', bytearray(4 << len(self.pin_nums)))
+            for value in range(len(self.lut)):
+                self.lut[value] = self.spread(value)
+        # Creating the Pin objects selects the SIO function and sets direction
+        direction = machine.Pin.OUT if mode == "out" else machine.Pin.IN
+        self.pins = [machine.Pin(pin_num, direction) for pin_num in self.pin_nums]
+
+    def spread(self, value):
+        """Map value bits onto the group's GPIO bit positions."""
+        bits = 0
+        for bit, pin_num in enumerate(self.pin_nums):
+            if value >> bit & 1:
+                bits |= 1 << pin_num
+        return bits
+
+    def write(self, value):
+        if self.shift >= 0:
+            bits = (value << self.shift) & self.mask
+        elif self.lut is not None:
+            bits = self.lut[value & (len(self.lut) - 1)]
+        else:
+            bits = self.spread(value)
+        machine.mem32[GPIO_OUT_XOR] = (machine.mem32[GPIO_OUT] ^ bits) & self.mask
+
+    def read(self):
+        raw = machine.mem32[GPIO_IN] & self.mask
+        if self.shift >= 0:
+            return raw >> self.shift
+        value = 0
+        for bit, pin_num in enumerate(self.pin_nums):
+            if raw >> pin_num & 1:
+                value |= 1 << bit
+        return value
 
 class DeviceManager:
     def __init__(self):
         self.pins = {}
         self.adc_pins = {}
         self.pwm_pins = {}
+        self.groups = {}
+        self.waves = {}
+        self.watches = {}
+        self.logger = None
+        # name -> (mode, pin number, pull) for everything registered by name
+        self.specs = {}
         self.reserved_pins = {
             25: "LED",  # onboard LED
             4: "ADC_TEMP"  # internal temperature sensor
         }
+        # Sampling ring buffer and the layout of the last capture in it
+        self.sample_buffer = None
+        self.sample_channels = []
+        self.sample_capacity = 0
+        self.sample_head = 0
+        self.sample_stored = 0
+        self.sample_rate = 0
+        self.sample_busy = False  # a capture is running on the core 1 worker
         
-    def register_pin(self, pin_num, name, mode="out", pull=None):
-        """Register a GPIO pin with a given name and mode."""
+    def register_pin(self, pin_num, name, mode="out", pull=None, value=None, freq=None):
+        """Register a GPIO pin with a given name and mode.
+
+        value sets the initial output level (out) or duty (pwm), and freq the
+        PWM frequency; both are used when restoring a saved registry.
+        """
         if pin_num in self.reserved_pins:
             raise ValueError(f"Pin {pin_num} is reserved for {self.reserved_pins[pin_num]}")
             
         if mode == "out":
-            pin = machine.Pin(pin_num, machine.Pin.OUT)
+            if value is None:
+                pin = machine.Pin(pin_num, machine.Pin.OUT)
+            else:
+                pin = machine.Pin(pin_num, machine.Pin.OUT, value=value)
         elif mode == "in":
             pull_mode = machine.Pin.PULL_UP if pull == "up" else machine.Pin.PULL_DOWN if pull == "down" else None
             pin = machine.Pin(pin_num, machine.Pin.IN, pull_mode)
@@ -26,19 +318,28 @@ class DeviceManager:
                 raise ValueError(f"Pin {pin_num} is not an ADC pin")
             pin = machine.ADC(pin_num)
             self.adc_pins[name] = pin
+            self.specs[name] = (mode, pin_num, None)
             return
         elif mode == "pwm":
             pin = machine.Pin(pin_num)
             pwm = machine.PWM(pin)
-            pwm.freq(1000)  # Default frequency 1kHz
+            pwm.freq(freq or 1000)  # Default frequency 1kHz
+            if value is not None:
+                pwm.duty_u16(value)
             self.pwm_pins[name] = pwm
+            self.specs[name] = (mode, pin_num, None)
             return
+        else:
+            raise ValueError(f"Invalid mode '{mode}' (use in, out, adc or pwm)")
             
         self.pins[name] = pin
+        self.specs[name] = (mode, pin_num, pull)
         
     def set_pin(self, name, value):
         """Set a digital pin high or low."""
         if name in self.pins:
+            if self.specs[name][0] != "out":
+                raise ValueError(f"Pin '{name}' is an input and cannot be written")
             self.pins[name].value(value)
         else:
             raise ValueError(f"Pin '{name}' not found")
@@ -58,8 +359,9 @@ class DeviceManager:
             raise ValueError(f"ADC '{name}' not found")
             
     def set_pwm(self, name, duty):
-        """Set PWM duty cycle (0-65535)."""
+        """Set PWM duty cycle (0-65535). Stops any wave running on the pin."""
         if name in self.pwm_pins:
+            self.stop_wave(name)
             self.pwm_pins[name].duty_u16(duty)
         else:
             raise ValueError(f"PWM '{name}' not found")
@@ -71,6 +373,328 @@ class DeviceManager:
         else:
             raise ValueError(f"PWM '{name}' not found")
             
+    def start_wave(self, name, table, freq, core1=False):
+        """Play a duty table on a PWM pin, freq times per second.
+
+        With core1=True the table is stepped by the core 1 worker instead of
+        a Timer on core 0.
+        """
+        if name not in self.pwm_pins:
+            raise ValueError(f"PWM '{name}' not found")
+        if freq <= 0 or freq * len(table) > WAVE_STEP_MAX_HZ:
+            raise ValueError(f"{len(table)}-step table at {freq} Hz exceeds {WAVE_STEP_MAX_HZ} steps/s")
+        self.stop_wave(name)
+        wave = Waveform(self.pwm_pins[name], table, freq, not core1)
+        if core1:
+            wave.worker_slot = worker.add_periodic(f"wave {name}", wave.callback, int(1000000 / wave.step_hz))
+        self.waves[name] = wave
+
+    def stop_wave(self, name):
+        """Stop the wave on a PWM pin. Returns False if none was running."""
+        wave = self.waves.pop(name, None)
+        if wave is None:
+            return False
+        wave.stop()
+        return True
+
+    def save_registry(self, path=REGISTRY_FILE):
+        """Write every registered device and its current state to flash."""
+        records = []
+        for name, spec in self.specs.items():
+            mode, pin_num, pull = spec
+            value = 0
+            freq = 0
+            if mode in ("out", "in"):
+                value = self.pins[name].value()
+            elif mode == "pwm":
+                value = self.pwm_pins[name].duty_u16()
+                freq = self.pwm_pins[name].freq()
+            records.append(struct.pack(REGISTRY_RECORD, REGISTRY_MODES.index(mode), pin_num,
+                                       REGISTRY_PULLS.index(pull), value, freq, len(name)) + name.encode())
+        for name, group in self.groups.items():
+            mode = "group_" + group.mode
+            value = group.read() if group.mode == "out" else 0
+            records.append(struct.pack(REGISTRY_RECORD, REGISTRY_MODES.index(mode), len(group.pin_nums),
+                                       0, value, 0, len(name)) + name.encode() + bytes(group.pin_nums))
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(struct.pack(REGISTRY_HEADER, REGISTRY_MAGIC, len(records)))
+            for record in records:
+                f.write(record)
+        try:
+            uos.rename(temp_path, path)
+        except OSError:
+            uos.remove(path)
+            uos.rename(temp_path, path)
+        return len(records)
+
+    def load_registry(self, path=REGISTRY_FILE):
+        """Recreate all devices from a saved registry in one pass.
+
+        Returns the number of devices restored; a missing file restores none.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return 0
+        header_size = struct.calcsize(REGISTRY_HEADER)
+        record_size = struct.calcsize(REGISTRY_RECORD)
+        magic, count = struct.unpack_from(REGISTRY_HEADER, data)
+        if magic != REGISTRY_MAGIC:
+            raise ValueError(f"'{path}' is not a device registry")
+        offset = header_size
+        for _ in range(count):
+            mode, pin_num, pull, value, freq, name_len = struct.unpack_from(REGISTRY_RECORD, data, offset)
+            offset += record_size
+            name = str(data[offset:offset + name_len], "utf-8")
+            offset += name_len
+            mode = REGISTRY_MODES[mode]
+            if mode.startswith("group_"):
+                pins = list(data[offset:offset + pin_num])
+                offset += pin_num
+                self.create_group(name, pins, mode[6:])
+                if mode == "group_out":
+                    self.groups[name].write(value)
+            elif mode == "out":
+                self.register_pin(pin_num, name, mode, value=value)
+            elif mode == "pwm":
+                self.register_pin(pin_num, name, mode, value=value, freq=freq)
+            else:
+                self.register_pin(pin_num, name, mode, REGISTRY_PULLS[pull])
+        return count
+
+    def watch(self, name, edge="rising", debounce_ms=0, callback=None):
+        """Count and timestamp edges on a digital pin from its IRQ.
+
+        callback(count), if given, runs via micropython.schedule after edges.
+        """
+        if name not in self.pins:
+            raise ValueError(f"Pin '{name}' not found")
+        if edge not in WATCH_TRIGGERS:
+            raise ValueError(f"Invalid edge '{edge}' (use rising, falling or both)")
+        micropython.alloc_emergency_exception_buf(100)
+        self.unwatch(name)
+        self.watches[name] = PinWatch(self.pins[name], edge, debounce_ms, callback)
+
+    def unwatch(self, name):
+        """Detach a pin's IRQ watch. Returns False if it was not watched."""
+        watch = self.watches.pop(name, None)
+        if watch is None:
+            return False
+        watch.stop()
+        return True
+
+    def edge_stats(self, name):
+        """Return (count, bounces, edges/s, min, avg, max interval us, age us).
+
+        Timing comes from the stored timestamps only; nothing is polled.
+        Interval fields are None until at least two edges are stored.
+        """
+        if name not in self.watches:
+            raise ValueError(f"Pin '{name}' is not being watched")
+        watch = self.watches[name]
+        count, bounces, head = watch.snapshot()
+        times = watch.times
+        stored = min(count, watch.size)
+        if stored < 2:
+            age = time.ticks_diff(time.ticks_us(), watch.last) if count else None
+            return count, bounces, None, None, None, None, age
+        index = (head - stored) % watch.size
+        previous = times[index]
+        shortest = None
+        longest = 0
+        for _ in range(stored - 1):
+            index = (index + 1) % watch.size
+            interval = time.ticks_diff(times[index], previous)
+            previous = times[index]
+            if shortest is None or interval < shortest:
+                shortest = interval
+            if interval > longest:
+                longest = interval
+        span = time.ticks_diff(previous, times[(head - stored) % watch.size])
+        average = span // (stored - 1)
+        rate = (stored - 1) * 1000000 / span if span > 0 else None
+        age = time.ticks_diff(time.ticks_us(), previous)
+        return count, bounces, rate, shortest, average, longest, age
+
+    def get_reader(self, name):
+        """Return a bound method reading a device's value as a u16."""
+        if name in self.adc_pins:
+            return self.adc_pins[name].read_u16
+        if name in self.pins:
+            return self.pins[name].value
+        if name in self.groups:
+            return self.groups[name].read
+        return self.get_sample_source(name).read_u16
+
+    def start_log(self, names, interval_ms, path, core1=False):
+        """Log the named devices every interval_ms to a binary log file.
+
+        With core1=True the records are taken by the core 1 worker instead
+        of a Timer on core 0.
+        """
+        from datalog import DataLogger, block_size_for
+        if self.logger is not None:
+            raise ValueError(f"Already logging to '{self.logger.path}'")
+        if interval_ms <= 0:
+            raise ValueError("Interval must be positive")
+        readers = [self.get_reader(name) for name in names]
+        logger = DataLogger(path, names, readers, interval_ms, block_size_for(path), not core1)
+        logger.worker_slot = None
+        if core1:
+            logger.worker_slot = worker.add_periodic(f"log {path}", logger.sample_callback, interval_ms * 1000)
+        self.logger = logger
+
+    def stop_log(self):
+        """Stop logging and flush. Returns the stopped logger, or None."""
+        logger = self.logger
+        if logger is not None:
+            if logger.worker_slot is not None:
+                worker.remove_periodic(logger.worker_slot)
+            logger.stop()
+            self.logger = None
+        return logger
+
+    def create_group(self, name, pin_nums, mode="out"):
+        """Register a named group of GPIOs driven or read as one value."""
+        if mode not in ("in", "out"):
+            raise ValueError(f"Invalid group mode '{mode}' (use in or out)")
+        if not pin_nums:
+            raise ValueError("A group needs at least one pin")
+        for pin_num in pin_nums:
+            if pin_num in self.reserved_pins:
+                raise ValueError(f"Pin {pin_num} is reserved for {self.reserved_pins[pin_num]}")
+            if not 0 <= pin_num <= 29:
+                raise ValueError(f"Pin {pin_num} is not a GPIO pin")
+        if len(set(pin_nums)) != len(pin_nums):
+            raise ValueError("A pin can only appear once in a group")
+        self.groups[name] = PinGroup(pin_nums, mode)
+
+    def delete_group(self, name):
+        if name not in self.groups:
+            raise ValueError(f"Group '{name}' not found")
+        del self.groups[name]
+
+    def write_group(self, name, value):
+        """Drive all pins of a group in one SIO register write."""
+        if name in self.groups:
+            if self.groups[name].mode != "out":
+                raise ValueError(f"Group '{name}' is an input group and cannot be written")
+            self.groups[name].write(value)
+        else:
+            raise ValueError(f"Group '{name}' not found")
+
+    def read_group(self, name):
+        """Read all pins of a group in one SIO register read."""
+        if name in self.groups:
+            return self.groups[name].read()
+        else:
+            raise ValueError(f"Group '{name}' not found")
+
+    def get_sample_source(self, name):
+        """Return the ADC for a registered ADC name, 'temp', or pin 26-28."""
+        if name in self.adc_pins:
+            return self.adc_pins[name]
+        if name in ("temp", "ADC_TEMP"):
+            import tempmon
+            return tempmon.adc()
+        if name in ("26", "27", "28"):
+            return machine.ADC(int(name))
+        raise ValueError(f"ADC '{name}' not found")
+
+    def get_sample_buffer(self, size=SAMPLE_BUFFER_SIZE):
+        """Return the sampling ring buffer, growing it only if it is too small."""
+        if self.sample_buffer is None or len(self.sample_buffer) < size:
+            self.sample_buffer = None
+            gc.collect()
+            self.sample_buffer = array('H', bytearray(2 * size))
+        return self.sample_buffer
+
+    def sample(self, names, rate_hz, count):
+        """Capture count scans of the named ADC channels at rate_hz.
+
+        Channels are interleaved in the ring buffer. Returns the number of
+        scans that started late because the requested rate was too high.
+        """
+        if rate_hz <= 0 or count <= 0:
+            raise ValueError("rate and count must be positive")
+        if self.sample_busy:
+            raise ValueError("A capture is already running on core 1")
+        return self.capture(names, rate_hz, count)
+
+    def capture(self, names, rate_hz, count):
+        sources = [self.get_sample_source(name) for name in names]
+        channels = len(sources)
+        buf = self.get_sample_buffer(min(count * channels, SAMPLE_BUFFER_SIZE))
+        capacity = len(buf) - len(buf) % channels
+        head, late = capture_samples(sources, channels, buf, capacity, 1000000 // rate_hz, count)
+        self.sample_channels = list(names)
+        self.sample_capacity = capacity
+        self.sample_head = head
+        self.sample_stored = min(count * channels, capacity)
+        self.sample_rate = rate_hz
+        return late
+
+    def submit_sample(self, names, rate_hz, count, report=None):
+        """Run sample() on the core 1 worker and return the task id.
+
+        report, if given, is called as report(late, elapsed_us) after the
+        capture and its return value becomes the task result (the late
+        count is the result otherwise).
+        The sample buffer is allocated here, on core 0, before submitting.
+        """
+        if rate_hz <= 0 or count <= 0:
+            raise ValueError("rate and count must be positive")
+        if self.sample_busy:
+            raise ValueError("A capture is already running on core 1")
+        self.get_sample_buffer(min(count * len(names), SAMPLE_BUFFER_SIZE))
+        self.sample_busy = True
+        try:
+            return worker.submit(f"sample {','.join(names)} {rate_hz} Hz x{count}",
+                                 self.run_sample, (names, rate_hz, count, report))
+        except Exception:
+            self.sample_busy = False
+            raise
+
+    def run_sample(self, names, rate_hz, count, report):
+        try:
+            start = time.ticks_us()
+            late = self.capture(names, rate_hz, count)
+            elapsed = time.ticks_diff(time.ticks_us(), start)
+            return report(late, elapsed) if report else late
+        finally:
+            self.sample_busy = False
+
+    def sample_start(self):
+        """Index of the oldest stored sample in the ring buffer."""
+        if self.sample_stored < self.sample_capacity:
+            return 0
+        return self.sample_head
+
+    def sample_summary(self, channel):
+        """Return (min, max, mean, rms) of one channel of the last capture."""
+        channels = len(self.sample_channels)
+        count = self.sample_stored // channels
+        if count == 0:
+            raise ValueError("No samples captured")
+        start = (self.sample_start() + channel) % self.sample_capacity
+        low, high, sum_hi, sum_lo, sq_hi, sq_lo = summarize_samples(
+            self.sample_buffer, start, count, channels, self.sample_capacity)
+        mean = (sum_hi * 0x1000000 + sum_lo) / count
+        rms = ((sq_hi * 0x1000000 + sq_lo) / count) ** 0.5 * 16
+        return low, high, mean, rms
+
+    def dump_samples(self, path):
+        """Write the last capture, oldest first, as raw little-endian u16."""
+        view = memoryview(self.sample_buffer)
+        start = self.sample_start()
+        with open(path, "wb") as f:
+            if start:
+                f.write(view[start:self.sample_capacity])
+            f.write(view[:self.sample_head if start else self.sample_stored])
+        return self.sample_stored * 2
+
     def list_devices(self):
         """List all registered devices."""
         print("\nRegistered Devices:")
@@ -85,12 +709,41 @@ class DeviceManager:
         if self.pwm_pins:
             print("\nPWM Pins:")
             for name, pin in self.pwm_pins.items():
-                print(f"  {name}: PWM {pin}")
+                wave = self.waves.get(name)
+                if wave:
+                    print(f"  {name}: PWM {pin} (wave {wave.freq} Hz, {wave.length} steps)")
+                else:
+                    print(f"  {name}: PWM {pin}")
+        if self.groups:
+            print("\nPin Groups:")
+            for name, group in self.groups.items():
+                pins = " ".join(str(pin_num) for pin_num in group.pin_nums)
+                print(f"  {name}: {group.mode} GPIO {pins}")
                 
     def cleanup(self):
         """Clean up all pins."""
+        self.stop_log()
+        for watch in self.watches.values():
+            watch.stop()
+        self.watches.clear()
+        for wave in self.waves.values():
+            wave.stop()
+        self.waves.clear()
         for pwm in self.pwm_pins.values():
             pwm.deinit()
         self.pins.clear()
         self.adc_pins.clear()
-        self.pwm_pins.clear()
\ No newline at end of file
+        self.pwm_pins.clear()
+        self.groups.clear()
+        self.specs.clear()
+
+# Shared instance, so the devices the bootloader restores are the ones the
+# shell sees
+manager = None
+
+def get_manager():
+    """Return the DeviceManager shared by main.py and the shell."""
+    global manager
+    if manager is None:
+        manager = DeviceManager()
+    return manager
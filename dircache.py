@@ -0,0 +1,44 @@
+import uos
+
+# Listings of the last few directories used for tab completion, most
+# recent first, so repeated Tabs do not rescan the same directory. Commands
+# that change a directory's contents (mkdir, rmdir, cp, mv, delete, ...)
+# call invalidate() with the path they touched. Directories with more than
+# MAX_ENTRIES entries are scanned each time instead of being cached.
+CACHE_SIZE = 4
+MAX_ENTRIES = 64
+
+directories = []  # (directory, [(name, is_dir)]) pairs
+
+def matches(directory, prefix):
+    """Return the sorted (name, is_dir) entries of directory whose names start with prefix."""
+    for index, item in enumerate(directories):
+        if item[0] == directory:
+            if index:
+                directories.insert(0, directories.pop(index))
+            return [entry for entry in item[1] if entry[0].startswith(prefix)]
+    entries = []
+    complete = True
+    for entry in uos.ilistdir(directory):
+        if len(entries) == MAX_ENTRIES and complete:
+            # Too big to keep: only collect what matches from here on
+            complete = False
+            entries = [item for item in entries if item[0].startswith(prefix)]
+        if complete or entry[0].startswith(prefix):
+            entries.append((entry[0], entry[1] == 0x4000))
+    entries.sort()
+    if not complete:
+        return entries
+    directories.insert(0, (directory, entries))
+    del directories[CACHE_SIZE:]
+    return [entry for entry in entries if entry[0].startswith(prefix)]
+
+def invalidate(path=None):
+    """Forget the listing that contains path and any listing below it; all listings without a path."""
+    if path is None:
+        del directories[:]
+        return
+    parent = path[:path.rfind("/")] or "/"
+    below = path.rstrip("/") + "/"
+    directories[:] = [item for item in directories
+                      if item[0] != parent and item[0] != path and not item[0].startswith(below)]
@@ -0,0 +1,350 @@
+import uos
+import gc
+import micropython
+import worker
+
+# Copy engine: every copy streams through one preallocated chunk buffer, so
+# peak memory stays constant regardless of file size. Stages run by bg on
+# core 1 get a buffer of their own, so they never share one with core 0.
+COPY_CHUNK_SIZE = 1024
+copy_buffer = None
+worker_buffer = None
+
+def reserve_worker_buffer():
+    """Allocate the core 1 buffer; called on core 0 before a bg task is queued."""
+    global worker_buffer
+    if worker_buffer is None:
+        worker_buffer = memoryview(bytearray(COPY_CHUNK_SIZE))
+
+def get_copy_buffer(chunk_size=COPY_CHUNK_SIZE):
+    """Return the shared copy buffer, reallocating only when the size changes.
+
+    On the worker thread the separate worker buffer is returned instead;
+    chunk_size only applies to core 0 copies.
+    """
+    global copy_buffer
+    if worker.on_worker():
+        reserve_worker_buffer()
+        return worker_buffer
+    if copy_buffer is None or len(copy_buffer) != chunk_size:
+        copy_buffer = None
+        gc.collect()
+        copy_buffer = memoryview(bytearray(chunk_size))
+    return copy_buffer
+
+def normpath(path, base="/"):
+    """Return path as an absolute path with '.', '..' and repeated '/' resolved.
+
+    A relative path is taken from base. Only the string is examined, so no
+    chdir or stat is needed.
+    """
+    if not path.startswith("/"):
+        path = base + "/" + path
+    parts = []
+    for part in path.split("/"):
+        if part == "..":
+            if parts:
+                parts.pop()
+        elif part and part != ".":
+            parts.append(part)
+    return "/" + "/".join(parts)
+
+def is_directory(path):
+    try:
+        return uos.stat(path)[0] & 0o170000 == 0o040000
+    except OSError:
+        return False
+
+def stream_copy(source, destination, chunk_size=COPY_CHUNK_SIZE, progress=False):
+    """Copy one file chunk by chunk and return the number of bytes copied."""
+    # Opening the destination truncates it, so copying a file onto itself
+    # would leave it empty
+    cwd = uos.getcwd()
+    if normpath(source, cwd) == normpath(destination, cwd):
+        raise OSError(f"'{source}' and '{destination}' are the same file")
+    buffer = get_copy_buffer(chunk_size)
+    total = uos.stat(source)[6] if progress else 0
+    step = max(total // 10, chunk_size)
+    next_report = step
+    copied = 0
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        while True:
+            count = src.readinto(buffer)
+            if not count:
+                break
+            dst.write(buffer[:count])
+            copied += count
+            if progress and copied >= next_report:
+                print(f"  {copied:,}/{total:,} bytes ({copied * 100 // max(total, 1)}%)")
+                next_report += step
+    return copied
+
+def copy_range(src, dst, start, end, buffer=None):
+    """Copy bytes [start, end) of an open file into another open file."""
+    if buffer is None:
+        buffer = get_copy_buffer()
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        count = src.readinto(buffer[:min(len(buffer), remaining)])
+        if not count:
+            break
+        dst.write(buffer[:count])
+        remaining -= count
+
+# Entry kinds yielded by walk()
+WALK_FILE = 0
+WALK_DIR = 1
+WALK_LEAVE = 2
+
+def walk(top, leave=False):
+    """Yield (path, kind, size) for every entry below top, depth first.
+
+    kind is WALK_FILE or WALK_DIR; with leave=True a WALK_LEAVE entry follows
+    the contents of each directory (top included). The walk keeps an explicit
+    stack holding one ilistdir iterator per level, so RAM use depends on how
+    deep the tree is, not on how many entries it has.
+    """
+    top = top.rstrip("/") or "/"
+    stack = [(top, uos.ilistdir(top))]
+    while stack:
+        directory, entries = stack[-1]
+        try:
+            entry = next(entries)
+        except StopIteration:
+            stack.pop()
+            if leave:
+                yield directory, WALK_LEAVE, 0
+            continue
+        path = ("" if directory == "/" else directory) + "/" + entry[0]
+        if entry[1] == 0x4000:
+            yield path, WALK_DIR, 0
+            stack.append((path, uos.ilistdir(path)))
+        else:
+            size = entry[3] if len(entry) > 3 and entry[3] >= 0 else uos.stat(path)[6]
+            yield path, WALK_FILE, size
+
+def copy_tree(source, destination, chunk_size=COPY_CHUNK_SIZE, progress=False):
+    """Copy a directory tree. Returns (files copied, bytes copied)."""
+    # A destination inside the source would be walked and copied again and
+    # again until the flash is full
+    cwd = uos.getcwd()
+    top = normpath(source, cwd)
+    target = normpath(destination, cwd)
+    if target == top or target.startswith(top.rstrip("/") + "/"):
+        raise OSError(f"Cannot copy '{source}' into itself ('{destination}')")
+    source = source.rstrip("/") or "/"
+    destination = destination.rstrip("/")
+    if not is_directory(destination):
+        uos.mkdir(destination)
+    files = 0
+    copied = 0
+    for path, kind, size in walk(source):
+        target = destination + path[len(source):]
+        if kind == WALK_DIR:
+            if not is_directory(target):
+                uos.mkdir(target)
+        else:
+            if progress:
+                print(f"{path} -> {target}")
+            copied += stream_copy(path, target, chunk_size, progress)
+            files += 1
+    return files, copied
+
+def remove_tree(path):
+    """Delete a directory and everything below it."""
+    for child, kind, size in walk(path, leave=True):
+        if kind == WALK_FILE:
+            uos.remove(child)
+        elif kind == WALK_LEAVE:
+            uos.rmdir(child)
+
+def match_pattern(pattern, name):
+    """Shell-style wildcard match supporting '*' and '?'."""
+    p = 0
+    n = 0
+    star = -1
+    mark = 0
+    while n < len(name):
+        if p < len(pattern) and (pattern[p] == "?" or pattern[p] == name[n]):
+            p += 1
+            n += 1
+        elif p < len(pattern) and pattern[p] == "*":
+            star = p
+            mark = n
+            p += 1
+        elif star >= 0:
+            p = star + 1
+            mark += 1
+            n = mark
+        else:
+            return False
+    while p < len(pattern) and pattern[p] == "*":
+        p += 1
+    return p == len(pattern)
+
+@micropython.viper
+def find_newline(buf, start: int, end: int) -> int:
+    data = ptr8(buf)
+    i = start
+    while i < end:
+        if data[i] == 10:
+            return i
+        i += 1
+    return -1
+
+@micropython.viper
+def rfind_newline(buf, end: int) -> int:
+    data = ptr8(buf)
+    i = end - 1
+    while i >= 0:
+        if data[i] == 10:
+            return i
+        i -= 1
+    return -1
+
+@micropython.viper
+def find_bytes(buf, start: int, end: int, pattern, length: int, fold: int) -> int:
+    data = ptr8(buf)
+    pat = ptr8(pattern)
+    last = end - length
+    i = start
+    while i <= last:
+        j = 0
+        while j < length:
+            c = data[i + j]
+            if fold and c >= 65 and c <= 90:
+                c += 32
+            if c != pat[j]:
+                break
+            j += 1
+        if j == length:
+            return i
+        i += 1
+    return -1
+
+def iter_lines(file, buffer=None):
+    """Yield the lines of an open binary file without their newlines.
+
+    The file is read through the shared copy buffer, so only the line being
+    yielded (plus any partial line spanning two chunks) is held in RAM.
+    """
+    if buffer is None:
+        buffer = get_copy_buffer()
+    pending = b""
+    while True:
+        count = file.readinto(buffer)
+        if not count:
+            break
+        start = 0
+        while True:
+            end = find_newline(buffer, start, count)
+            if end < 0:
+                break
+            if pending:
+                yield str(pending + bytes(buffer[start:end]), "utf-8")
+                pending = b""
+            else:
+                yield str(buffer[start:end], "utf-8")
+            start = end + 1
+        if start < count:
+            pending += bytes(buffer[start:count])
+    if pending:
+        yield str(pending, "utf-8")
+
+def decode_line(data):
+    try:
+        return str(data, "utf-8")
+    except UnicodeError:
+        return "(binary data)"
+
+def grep_lines(file, pattern, ignore_case=False, invert=False, buffer=None):
+    """Yield (line number, line) for each line of an open binary file containing pattern.
+
+    pattern is bytes (lower case when ignore_case is set). The file is read
+    through a fixed buffer; the unfinished line at the end of each read is
+    carried into the next one, so matches spanning two reads are still found.
+    Lines longer than half the buffer are reported by their last part only.
+    """
+    if buffer is None:
+        buffer = get_copy_buffer()
+    keep_limit = len(buffer) // 2
+    length = len(pattern)
+    if length == 0 or length > keep_limit:
+        raise ValueError(f"Pattern must be 1 to {keep_limit} bytes")
+    fold = 1 if ignore_case else 0
+    carry = 0
+    matched = False
+    number = 1
+    while True:
+        count = file.readinto(buffer[carry:])
+        if not count:
+            break
+        end = carry + count
+        start = 0
+        while True:
+            newline = find_newline(buffer, start, end)
+            if newline < 0:
+                break
+            if not matched:
+                matched = find_bytes(buffer, start, newline, pattern, length, fold) >= 0
+            if matched != invert:
+                yield number, decode_line(bytes(buffer[start:newline]))
+            matched = False
+            number += 1
+            start = newline + 1
+        if start < end and not matched:
+            matched = find_bytes(buffer, start, end, pattern, length, fold) >= 0
+        carry = min(end - start, keep_limit)
+        if carry:
+            buffer[0:carry] = bytes(buffer[end - carry:end])
+    if carry and matched != invert:
+        yield number, decode_line(bytes(buffer[0:carry]))
+
+def open_read(path):
+    """Open a file for binary reading; .gz files are decompressed on the fly."""
+    if path.endswith(".gz"):
+        import gzfile
+        return gzfile.GzipReader(path)
+    return open(path, 'rb')
+
+class LimitedReader:
+    """Wraps an open file so readinto stops after limit bytes."""
+    def __init__(self, file, limit):
+        self.file = file
+        self.remaining = limit
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        if len(buffer) > self.remaining:
+            buffer = buffer[:self.remaining]
+        count = self.file.readinto(buffer)
+        self.remaining -= count or 0
+        return count
+
+def find_tail_offset(file, lines, buffer=None):
+    """Return the offset of the last `lines` lines by scanning back from EOF."""
+    if buffer is None:
+        buffer = get_copy_buffer()
+    end = file.seek(0, 2)
+    if end == 0 or lines <= 0:
+        return end
+    file.seek(end - 1)
+    if file.read(1) == b"\n":
+        end -= 1
+    pos = end
+    while pos > 0:
+        size = min(len(buffer), pos)
+        pos -= size
+        file.seek(pos)
+        file.readinto(buffer[:size])
+        index = size
+        while True:
+            index = rfind_newline(buffer, index)
+            if index < 0:
+                break
+            lines -= 1
+            if lines == 0:
+                return pos + index + 1
+    return 0
@@ -0,0 +1,176 @@
+import uos
+import struct
+import binascii
+from fsutil import get_copy_buffer
+
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
+# gzip files built on MicroPython's deflate module. The gzip header and
+# trailer are written here and only the raw deflate body goes through
+# DeflateIO, so the header can record the window size in an "AW" extra
+# field: files compressed on the device use a WINDOW_BITS window and are
+# read back with the same small window, while other gzip files need the
+# full 32 KB one. Data streams through the shared copy buffer both ways.
+GZIP_SUFFIX = ".gz"
+WINDOW_BITS = 10
+READ_WINDOW_BITS = 15
+EXTRA_ID = b"AW"
+
+FLAG_EXTRA = 0x04
+FLAG_NAME = 0x08
+FLAG_COMMENT = 0x10
+FLAG_HEADER_CRC = 0x02
+
+def is_gzip(path):
+    return path.endswith(GZIP_SUFFIX)
+
+def require_deflate():
+    if deflate is None:
+        raise OSError("This firmware has no deflate module")
+
+def skip_string(file):
+    while file.read(1) not in (b"\x00", b""):
+        pass
+
+def read_header(file):
+    """Parse a gzip header and return the window bits to decompress with."""
+    header = file.read(10)
+    if len(header) < 10 or header[0] != 0x1F or header[1] != 0x8B or header[2] != 8:
+        raise ValueError("Not a gzip file")
+    flags = header[3]
+    window_bits = READ_WINDOW_BITS
+    if flags & FLAG_EXTRA:
+        extra = file.read(struct.unpack("<H", file.read(2))[0])
+        index = 0
+        while index + 4 <= len(extra):
+            length = struct.unpack_from("<H", extra, index + 2)[0]
+            if extra[index:index + 2] == EXTRA_ID and length == 1:
+                window_bits = extra[index + 4]
+            index += 4 + length
+    if flags & FLAG_NAME:
+        skip_string(file)
+    if flags & FLAG_COMMENT:
+        skip_string(file)
+    if flags & FLAG_HEADER_CRC:
+        file.read(2)
+    return window_bits
+
+class GzipReader:
+    """Readable view of the decompressed contents of a gzip file."""
+
+    def __init__(self, path):
+        require_deflate()
+        self.file = open(path, "rb")
+        try:
+            self.stream = deflate.DeflateIO(self.file, deflate.RAW, read_header(self.file))
+        except Exception:
+            self.file.close()
+            raise
+
+    def readinto(self, buffer):
+        return self.stream.readinto(buffer)
+
+    def close(self):
+        self.stream.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def compress_file(source, destination):
+    """Compress source into a gzip file. Returns (bytes in, bytes out)."""
+    require_deflate()
+    buffer = get_copy_buffer()
+    try:
+        mtime = uos.stat(source)[8] & 0xFFFFFFFF
+    except OSError:
+        mtime = 0
+    crc = 0
+    size = 0
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            dst.write(struct.pack("<BBBBIBBH", 0x1F, 0x8B, 8, FLAG_EXTRA, mtime, 0, 255, 5))
+            dst.write(EXTRA_ID + struct.pack("<HB", 1, WINDOW_BITS))
+            stream = deflate.DeflateIO(dst, deflate.RAW, WINDOW_BITS)
+            while True:
+                count = src.readinto(buffer)
+                if not count:
+                    break
+                chunk = buffer[:count]
+                stream.write(chunk)
+                crc = binascii.crc32(chunk, crc)
+                size += count
+            stream.close()
+            dst.write(struct.pack("<II", crc & 0xFFFFFFFF, size & 0xFFFFFFFF))
+    except Exception:
+        # Never leave a truncated archive behind (e.g. flash full)
+        try:
+            uos.remove(destination)
+        except OSError:
+            pass
+        raise
+    return size, uos.stat(destination)[6]
+
+def decompress_file(source, destination):
+    """Decompress a gzip file, checking its CRC and length. Returns (bytes in, bytes out)."""
+    buffer = get_copy_buffer()
+    crc = 0
+    size = 0
+    with GzipReader(source) as reader, open(destination, "wb") as dst:
+        while True:
+            count = reader.readinto(buffer)
+            if not count:
+                break
+            chunk = buffer[:count]
+            dst.write(chunk)
+            crc = binascii.crc32(chunk, crc)
+            size += count
+    with open(source, "rb") as src:
+        src.seek(-8, 2)
+        expected_crc, expected_size = struct.unpack("<II", src.read(8))
+    if expected_crc != crc & 0xFFFFFFFF or expected_size != size & 0xFFFFFFFF:
+        uos.remove(destination)
+        raise ValueError(f"'{source}' is corrupt (CRC or length mismatch)")
+    return uos.stat(source)[6], size
+
+def rotate(path, max_bytes, keep=3):
+    """Compress path into path.1.gz once it reaches max_bytes, shifting older archives.
+
+    Archives beyond keep are deleted and path is truncated, so a script can
+    keep appending to it. Returns True if the log was rotated.
+    """
+    try:
+        if uos.stat(path)[6] < max_bytes:
+            return False
+    except OSError:
+        return False
+    for number in range(keep, 0, -1):
+        older = f"{path}.{number}{GZIP_SUFFIX}"
+        try:
+            if number == keep:
+                uos.remove(older)
+            else:
+                uos.rename(older, f"{path}.{number + 1}{GZIP_SUFFIX}")
+        except OSError:
+            pass
+    compress_file(path, f"{path}.1{GZIP_SUFFIX}")
+    open(path, "wb").close()
+    return True
+
+# Logs rotated by the logrotate background job: path -> (max bytes, keep)
+rotations = {}
+rotation_job = None
+
+def check_rotations():
+    """Rotate every registered log that has reached its size. Returns the paths rotated."""
+    rotated = []
+    for path, (max_bytes, keep) in rotations.items():
+        if rotate(path, max_bytes, keep):
+            rotated.append(path)
+    return rotated
@@ -0,0 +1,98 @@
+import uos
+import struct
+import hashlib
+import binascii
+from fsutil import get_copy_buffer
+
+# SHA-256 digests of files, cached on flash so an unchanged file costs one
+# stat instead of a full read. Each record in CACHE_FILE is a RECORD header
+# (size, mtime, path length), the path and the 32-byte digest. The cache is
+# loaded on first use into a dict of path -> packed (size, mtime, digest),
+# written back via a temporary file only when something changed, and
+# dropped from RAM again once the command that needed it is done.
+CACHE_FILE = "/.hashcache"
+CACHE_MAGIC = b"AHC1"
+RECORD = "<IIH"
+RECORD_SIZE = 10
+DIGEST_SIZE = 32
+
+entries = None
+dirty = False
+
+def load():
+    """Read the cache file into entries unless it is already loaded."""
+    global entries
+    if entries is not None:
+        return
+    entries = {}
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            if f.read(4) != CACHE_MAGIC:
+                return
+            while True:
+                header = f.read(RECORD_SIZE)
+                if len(header) < RECORD_SIZE:
+                    break
+                size, mtime, length = struct.unpack(RECORD, header)
+                path = f.read(length).decode()
+                entries[path] = header[:8] + f.read(DIGEST_SIZE)
+    except (OSError, ValueError):
+        pass
+
+def save():
+    """Write the cache back if anything changed, then release it from RAM."""
+    global entries, dirty
+    if not dirty:
+        entries = None
+        return
+    try:
+        temp_path = CACHE_FILE + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(CACHE_MAGIC)
+            for path, entry in entries.items():
+                encoded = path.encode()
+                f.write(entry[:8])
+                f.write(struct.pack("<H", len(encoded)))
+                f.write(encoded)
+                f.write(entry[8:])
+        try:
+            uos.remove(CACHE_FILE)
+        except OSError:
+            pass
+        uos.rename(temp_path, CACHE_FILE)
+    finally:
+        entries = None
+        dirty = False
+
+def prune(keep):
+    """Drop cached digests for paths not in keep (after a walk of the whole filesystem)."""
+    global dirty
+    for path in [path for path in entries if path not in keep]:
+        del entries[path]
+        dirty = True
+
+def hash_file(path):
+    """Return the SHA-256 digest of a file, read through the shared copy buffer."""
+    buffer = get_copy_buffer()
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            hasher.update(buffer[:count])
+    return hasher.digest()
+
+def digest(path, refresh=False):
+    """Return (hex digest, cached) for an absolute path; refresh ignores the cache."""
+    global dirty
+    load()
+    stats = uos.stat(path)
+    stamp = struct.pack("<II", stats[6], stats[8] & 0xFFFFFFFF)
+    entry = entries.get(path)
+    if entry is not None and entry[:8] == stamp and not refresh:
+        return binascii.hexlify(entry[8:]).decode(), True
+    value = hash_file(path)
+    entries[path] = stamp + value
+    dirty = True
+    return binascii.hexlify(value).decode(), False
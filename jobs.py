@@ -0,0 +1,35 @@
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# Background jobs started with '&': job id -> [command line, task]
+jobs = {}
+next_job_id = 1
+
+async def run_job(job_id, coroutine):
+    try:
+        await coroutine
+        print(f"\n[{job_id}] Done    {jobs[job_id][0]}")
+    except asyncio.CancelledError:
+        print(f"\n[{job_id}] Killed  {jobs[job_id][0]}")
+    except Exception as e:
+        print(f"\n[{job_id}] Failed  {jobs[job_id][0]}: {e}")
+    finally:
+        del jobs[job_id]
+
+def spawn(command_line, coroutine):
+    """Run a command coroutine as a background job and return its id."""
+    global next_job_id
+    job_id = next_job_id
+    next_job_id += 1
+    jobs[job_id] = [command_line, None]
+    jobs[job_id][1] = asyncio.create_task(run_job(job_id, coroutine))
+    return job_id
+
+def kill(job_id):
+    """Cancel a background job. Returns False if there is no such job."""
+    if job_id not in jobs:
+        return False
+    jobs[job_id][1].cancel()
+    return True
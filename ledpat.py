@@ -0,0 +1,126 @@
+import machine
+from array import array
+
+# Status LED pattern engine. A single hardware Timer steps the LED through
+# precomputed duration tables, so showing a pattern never blocks the caller.
+#
+# A pattern is an array of durations in ticks, alternating LED on and LED
+# off and starting with on (a zero skips that phase). A background pattern
+# (idle, busy, off, ...) repeats forever; one-shot patterns such as error
+# flashes are queued with play() and shown over it, one after another.
+TICK_MS = 20
+QUEUE_SIZE = 4
+
+def ticks(*durations_ms):
+    """Build a pattern from on/off durations in milliseconds."""
+    return array('H', [max(1, (ms + TICK_MS // 2) // TICK_MS) if ms else 0 for ms in durations_ms])
+
+def blinks(count, on_ms, off_ms):
+    """Build a pattern of count identical blinks."""
+    return ticks(*((on_ms, off_ms) * count))
+
+patterns = {
+    "off": ticks(0, 1000),
+    "idle": ticks(100, 4900),
+    "busy": ticks(1000, 0),
+    "halted": ticks(1000, 1000),
+    "minor": blinks(5, 100, 100),
+    "critical": blinks(3, 500, 500),
+    "default": blinks(5, 100, 100),
+    "power": blinks(3, 500, 500),
+    "countdown": ticks(100, 900),
+}
+
+led = None
+timer = None
+background = patterns["off"]
+current = background
+index = 0
+remaining = 1
+queue = [None] * QUEUE_SIZE
+queue_head = 0
+queue_count = 0
+
+def start(pin_num=25):
+    """Drive the LED on pin_num from the pattern timer. Later calls keep the first pin."""
+    global led, timer
+    if timer is not None:
+        return led
+    led = machine.Pin(pin_num, machine.Pin.OUT)
+    led.value(0)
+    timer = machine.Timer()
+    timer.init(period=TICK_MS, mode=machine.Timer.PERIODIC, callback=step)
+    return led
+
+def stop():
+    """Stop the pattern timer and turn the LED off."""
+    global timer
+    if timer is not None:
+        timer.deinit()
+        timer = None
+    if led is not None:
+        led.value(0)
+
+def step(t):
+    """Timer callback: advance the current pattern by one tick."""
+    global current, index, remaining, queue_head, queue_count
+    remaining -= 1
+    if remaining > 0:
+        return
+    while True:
+        index += 1
+        if index >= len(current):
+            index = 0
+            if current is not background:
+                current = background
+            if queue_count:
+                current = queue[queue_head]
+                queue[queue_head] = None
+                queue_head = (queue_head + 1) % QUEUE_SIZE
+                queue_count -= 1
+        remaining = current[index]
+        if remaining:
+            break
+    led.value(1 - (index & 1))
+
+def lookup(pattern):
+    if isinstance(pattern, str):
+        if pattern not in patterns:
+            raise ValueError(f"Unknown LED pattern '{pattern}'")
+        return patterns[pattern]
+    if not sum(pattern):
+        raise ValueError("LED pattern has no duration")
+    return pattern
+
+def play(pattern):
+    """Queue a one-shot pattern (a name or a ticks() array). Returns False if the queue is full."""
+    global current, index, remaining, queue_count
+    pattern = lookup(pattern)
+    state = machine.disable_irq()
+    try:
+        if current is background:
+            # Interrupt the background pattern straight away
+            current = pattern
+            index = -1
+            remaining = 1
+            return True
+        if queue_count == QUEUE_SIZE:
+            return False
+        queue[(queue_head + queue_count) % QUEUE_SIZE] = pattern
+        queue_count += 1
+        return True
+    finally:
+        machine.enable_irq(state)
+
+def set_background(pattern):
+    """Set the repeating pattern shown whenever no one-shot pattern is playing."""
+    global background, current, index, remaining
+    pattern = lookup(pattern)
+    state = machine.disable_irq()
+    if current is background:
+        # Switch straight away rather than at the end of the old cycle
+        current = pattern
+        index = -1
+        remaining = 1
+    background = pattern
+    machine.enable_irq(state)
@@ -0,0 +1,182 @@
+import sys
+import select
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# How long the reader yields to other tasks when no input is waiting
+POLL_INTERVAL = 0.01
+
+# Commands remembered for the up/down arrows and !n, oldest overwritten first
+HISTORY_SIZE = 20
+
+poller = select.poll()
+poller.register(sys.stdin, select.POLLIN)
+
+# Set when the last character was a carriage return, so a following
+# line feed from a CRLF terminal is not read as an empty line
+last_was_cr = False
+
+# History ring: entry number n (counting from 1 for the session) lives in
+# slot (n - 1) % HISTORY_SIZE while it is one of the last HISTORY_SIZE
+history = [None] * HISTORY_SIZE
+history_count = 0
+
+def add_history(line):
+    global history_count
+    if not line.strip() or (history_count and history[(history_count - 1) % HISTORY_SIZE] == line):
+        return
+    history[history_count % HISTORY_SIZE] = line
+    history_count += 1
+
+def history_entry(number):
+    """Return history entry number, or None once it has been overwritten."""
+    if number < 1 or number > history_count or number <= history_count - HISTORY_SIZE:
+        return None
+    return history[(number - 1) % HISTORY_SIZE]
+
+def history_entries():
+    """Return [(number, line)] for the remembered commands, oldest first."""
+    first = max(1, history_count - HISTORY_SIZE + 1)
+    return [(number, history_entry(number)) for number in range(first, history_count + 1)]
+
+def expand_history(line):
+    """Expand !! or !n at the start of a line. Returns None if there is no such entry."""
+    reference, _, rest = line.partition(" ")
+    if reference == "!!":
+        entry = history_entry(history_count)
+    else:
+        try:
+            entry = history_entry(int(reference[1:]))
+        except ValueError:
+            return line
+    if entry is None:
+        return None
+    return entry + (" " + rest if rest else "")
+
+def redraw(prompt, chars, position):
+    """Rewrite the whole input line and put the cursor back at position."""
+    sys.stdout.write("\r" + prompt + "".join(chars) + "\x1b[K")
+    if position < len(chars):
+        sys.stdout.write("\b" * (len(chars) - position))
+
+def read_escape():
+    """Return the final part of an escape sequence ('A', '3~', ...) or '' for a lone ESC."""
+    if not poller.poll(20) or sys.stdin.read(1) not in ("[", "O"):
+        return ""
+    sequence = ""
+    while poller.poll(20):
+        char = sys.stdin.read(1)
+        sequence += char
+        if not char.isdigit():
+            break
+    return sequence
+
+def complete(prompt, chars, position):
+    """Tab: complete the word before the cursor, or list the choices."""
+    import completion
+    word, candidates = completion.complete("".join(chars[:position]))
+    if not candidates:
+        sys.stdout.write("\x07")
+        return position
+    common = candidates[0]
+    for candidate in candidates[1:]:
+        length = 0
+        while length < min(len(common), len(candidate)) and common[length] == candidate[length]:
+            length += 1
+        common = common[:length]
+    if len(common) > len(word):
+        chars[position:position] = list(common[len(word):])
+        position += len(common) - len(word)
+    elif len(candidates) > 1:
+        sys.stdout.write("\n" + "  ".join(candidate.rstrip() for candidate in candidates) + "\n")
+    redraw(prompt, chars, position)
+    return position
+
+async def read_line(prompt=""):
+    """Read one line from stdin without blocking other asyncio tasks.
+
+    Characters are echoed as they arrive and editing is handled locally,
+    since the console is not line-buffered while a script is running:
+    left/right move the cursor, up/down walk the history, Tab completes
+    and a line starting with !! or !n repeats a remembered command.
+    """
+    global last_was_cr
+    sys.stdout.write(prompt)
+    chars = []
+    position = 0
+    browsing = history_count + 1
+    draft = []
+    while True:
+        if not poller.poll(0):
+            await asyncio.sleep(POLL_INTERVAL)
+            continue
+        char = sys.stdin.read(1)
+        if not char:
+            raise EOFError
+        if char == "\n" and last_was_cr:
+            last_was_cr = False
+            continue
+        last_was_cr = char == "\r"
+        if char in ("\r", "\n"):
+            sys.stdout.write("\n")
+            line = "".join(chars)
+            if line.startswith("!"):
+                expanded = expand_history(line)
+                if expanded is None:
+                    print(f"{line.split()[0]}: no such history entry")
+                    return ""
+                if expanded != line:
+                    print(expanded)
+                line = expanded
+            add_history(line)
+            return line
+        if char in ("\x08", "\x7f"):
+            if position:
+                position -= 1
+                chars.pop(position)
+                redraw(prompt, chars, position)
+        elif char == "\x03":
+            raise KeyboardInterrupt
+        elif char == "\t":
+            position = complete(prompt, chars, position)
+        elif char == "\x1b":
+            key = read_escape()
+            if key in ("A", "B"):
+                step = -1 if key == "A" else 1
+                number = browsing + step
+                if number == history_count + 1:
+                    chars = draft
+                elif history_entry(number) is not None:
+                    if browsing == history_count + 1:
+                        draft = chars
+                    chars = list(history_entry(number))
+                else:
+                    continue
+                browsing = number
+                position = len(chars)
+                redraw(prompt, chars, position)
+            elif key == "D" and position:
+                position -= 1
+                sys.stdout.write("\b")
+            elif key == "C" and position < len(chars):
+                sys.stdout.write(chars[position])
+                position += 1
+            elif key in ("H", "1~"):
+                position = 0
+                redraw(prompt, chars, position)
+            elif key in ("F", "4~"):
+                position = len(chars)
+                redraw(prompt, chars, position)
+            elif key == "3~" and position < len(chars):
+                chars.pop(position)
+                redraw(prompt, chars, position)
+        elif char >= " ":
+            chars.insert(position, char)
+            position += 1
+            if position == len(chars):
+                sys.stdout.write(char)
+            else:
+                redraw(prompt, chars, position)
@@ -1,62 +1,180 @@
+import bootlog
 import time
 import machine
-import json
+import uos
+import sys
 import gc
+import codecache
+import ledpat
+from devman import get_manager, REGISTRY_FILE
 
 # Constants
 VERSION = "1.9"
 CONFIG_FILE = "config.json"
 
+# config.json is parsed with json only when it changes; the result is kept
+# in CONFIG_CACHE as tab-separated "key, type, value" lines under a header
+# holding the size and mtime of the config.json it came from.
+CONFIG_CACHE = "config.cache"
+
+# Default configuration
+default_config = {
+    "LED_PIN": 25,
+    "BOOT_DELAY": 3,
+    "MAIN_SCRIPT": "Angusto.py",
+    "USE_CODE_CACHE": True,
+    "DEVICE_REGISTRY": REGISTRY_FILE,
+    "FAST_BOOT": True,
+    "BOOT_KEY_WINDOW_MS": 500,
+    "BOOT_HOLD_PIN": -1
+}
+
+def read_config_cache(stamp):
+    """Return the cached configuration, or None if missing or stale."""
+    try:
+        with open(CONFIG_CACHE, 'r') as f:
+            if f.readline().rstrip("\n") != f"{stamp[0]} {stamp[1]}":
+                return None
+            config = {}
+            for line in f:
+                key, kind, value = line.rstrip("\n").split("\t", 2)
+                if kind == "i":
+                    config[key] = int(value)
+                elif kind == "b":
+                    config[key] = value == "1"
+                else:
+                    config[key] = value
+            return config
+    except (OSError, ValueError):
+        return None
+
+def write_config_cache(config, stamp):
+    lines = [f"{stamp[0]} {stamp[1]}\n"]
+    for key, value in config.items():
+        if isinstance(value, bool):
+            lines.append(f"{key}\tb\t{1 if value else 0}\n")
+        elif isinstance(value, int):
+            lines.append(f"{key}\ti\t{value}\n")
+        elif isinstance(value, str) and "\n" not in value:
+            lines.append(f"{key}\ts\t{value}\n")
+        else:
+            return  # Not representable; parse the json every boot instead
+    try:
+        with open(CONFIG_CACHE, 'w') as f:
+            for line in lines:
+                f.write(line)
+    except OSError as e:
+        print(f"Error writing config cache: {e}")
+
 # Load configuration
 def load_config():
-    # Default configuration
-    default_config = {
-        "LED_PIN": 25,
-        "BOOT_DELAY": 3,
-        "MAIN_SCRIPT": "Angusto.py"
-    }
-    
+    config = dict(default_config)
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            print("Loading config file...")
-            return json.load(f)
-    except:
+        stats = uos.stat(CONFIG_FILE)
+    except OSError:
         print("Configuration not found. Creating new config file with defaults...")
         try:
+            import json
             with open(CONFIG_FILE, 'w') as f:
                 json.dump(default_config, f)
             print("New configuration file created successfully.")
         except Exception as e:
             print(f"Error creating config file: {e}")
-        return default_config
+        return config
+
+    stamp = (stats[6], stats[8] & 0xFFFFFFFF)
+    cached = read_config_cache(stamp)
+    if cached is not None:
+        config.update(cached)
+        return config
+    try:
+        import json
+        with open(CONFIG_FILE, 'r') as f:
+            print("Loading config file...")
+            loaded = json.load(f)
+        write_config_cache(loaded, stamp)
+        config.update(loaded)
+    except Exception as e:
+        print(f"Error reading config file, using defaults: {e}")
+    return config
 
 # Initialize configuration
 config = load_config()
+bootlog.mark("config")
+
+# Initialize hardware. The LED is driven by the ledpat timer from here on,
+# and the shell keeps using the same engine and pin.
+ledpat.start(config["LED_PIN"])
 
-# Initialize hardware
-led_pin = machine.Pin(config["LED_PIN"], machine.Pin.OUT)
+def restore_devices():
+    """Bring saved devices to their last known state before anything else runs."""
+    try:
+        start = time.ticks_ms()
+        path = config.get("DEVICE_REGISTRY", REGISTRY_FILE)
+        if not path.startswith("/"):
+            path = "/" + path
+        count = get_manager().load_registry(path)
+        if count:
+            print(f"Restored {count} devices in {time.ticks_diff(time.ticks_ms(), start)} ms")
+    except Exception as e:
+        print(f"Error restoring devices: {e}")
 
-def blink_led(times, on_time=0.1, off_time=0.1):
-    for _ in range(times):
-        led_pin.value(1)
-        time.sleep(on_time)
-        led_pin.value(0)
-        time.sleep(off_time)
+restore_devices()
+bootlog.mark("hardware")
 
 def power_light():
-    print(f"Bootloader {VERSION} (C) Draconiator, Claude and ChatGPT")
-    blink_led(3, 0.5, 0.5)  # Three longer blinks
-    time.sleep(1)
+    ledpat.play("power")  # Three longer blinks
+
+def console_requested():
+    """Return why the boot delay should run, or None to boot straight away.
+
+    The delay runs when fast boot is off, when BOOT_HOLD_PIN is held low, or
+    when a key arrives on the console within BOOT_KEY_WINDOW_MS. The LED is
+    lit while the window is open.
+    """
+    if not config["FAST_BOOT"]:
+        return "fast boot disabled"
+    hold_pin = config["BOOT_HOLD_PIN"]
+    if hold_pin >= 0 and machine.Pin(hold_pin, machine.Pin.IN, machine.Pin.PULL_UP).value() == 0:
+        return f"GPIO {hold_pin} held"
+    window = config["BOOT_KEY_WINDOW_MS"]
+    if window <= 0:
+        return None
+    import select
+    poller = select.poll()
+    poller.register(sys.stdin, select.POLLIN)
+    ledpat.set_background("busy")
+    pressed = poller.poll(window)
+    ledpat.set_background("off")
+    poller.unregister(sys.stdin)
+    if pressed:
+        sys.stdin.read(1)
+        return "key pressed"
+    return None
 
 def load_and_run_script(script_name):
     try:
         print(f"Attempting to load {script_name}")
-        with open(script_name, 'r') as script_file:
-            script_content = script_file.read()
-        print(f"Script loaded: {script_name}")
+        start = time.ticks_ms()
+        use_cache = config.get("USE_CODE_CACHE", True)
+        path = codecache.find_mpy(script_name) if use_cache else None
+        if path is not None:
+            print(f"Script found precompiled: {path}")
+            bootlog.mark("script")
+            gc.collect()
+            print("Executing script content:")
+            ledpat.set_background("busy")
+            codecache.run_mpy(path)
+            return True
+        code, from_cache = codecache.load_code(script_name, use_cache)
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        source = "bytecode cache" if from_cache else "source"
+        print(f"Script loaded: {script_name} (from {source} in {elapsed} ms)")
+        bootlog.mark("script")
+        gc.collect()
         print("Executing script content:")
-        led_pin.value(1)
-        exec(script_content, {'__name__': '__main__'})
+        ledpat.set_background("busy")
+        exec(code, {'__name__': '__main__'})
     except OSError as e:
         print(f"Error accessing script '{script_name}': {e}")
         return False
@@ -66,15 +184,25 @@ def load_and_run_script(script_name):
     return True
 
 def main():
-    power_light()
-    print("Bootloader is running")
-    print(f"Waiting {config['BOOT_DELAY']} seconds before loading main script...")
-    
-    # Simple countdown without input check
-    for i in range(config['BOOT_DELAY'], 0, -1):
-        print(f"Loading in {i} seconds...")
-        blink_led(1, 0.1, 0.1)
-        time.sleep(0.9)  # Adjust to make each iteration close to 1 second
+    print(f"Bootloader {VERSION} (C) Draconiator, Claude and ChatGPT")
+    if config["FAST_BOOT"] and config["BOOT_KEY_WINDOW_MS"] > 0:
+        print(f"Press a key within {config['BOOT_KEY_WINDOW_MS']} ms to pause the boot")
+    reason = console_requested()
+    if reason:
+        bootlog.mode = f"delayed ({reason})"
+        power_light()
+        print("Bootloader is running")
+        print(f"Waiting {config['BOOT_DELAY']} seconds before loading main script...")
+
+        # Simple countdown without input check; the LED blinks once a second
+        ledpat.set_background("countdown")
+        for i in range(config['BOOT_DELAY'], 0, -1):
+            print(f"Loading in {i} seconds...")
+            time.sleep(1)
+        ledpat.set_background("off")
+    else:
+        bootlog.mode = "fast"
+    bootlog.mark("boot window")
 
     print(f"Loading {config['MAIN_SCRIPT']}...")
     if load_and_run_script(config['MAIN_SCRIPT']):
@@ -88,6 +216,6 @@ if __name__ == "__main__":
     gc.enable()  # Enable garbage collection
     main()
     print("Script execution completed. Entering idle loop.")
+    ledpat.set_background("halted")
     while True:
-        led_pin.toggle()
         time.sleep(1)
\ No newline at end of file
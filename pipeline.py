@@ -0,0 +1,143 @@
+import commands
+import shellenv
+import dircache
+from shellenv import error_flash
+from fsutil import normpath
+
+# Shell operators recognised between pipeline stages
+OPERATORS = ("|", ">", ">>")
+
+def tokenize(line):
+    """Split a command line into words and operators, honouring quotes."""
+    tokens = []
+    word = ""
+    quote = None
+    quoted = False
+    index = 0
+    while index < len(line):
+        char = line[index]
+        if quote:
+            if char == quote:
+                quote = None
+            else:
+                word += char
+        elif char in "\"'":
+            quote = char
+            quoted = True
+        elif char in " \t|>":
+            if word or quoted:
+                tokens.append(word)
+                word = ""
+                quoted = False
+            if char == "|":
+                tokens.append("|")
+            elif char == ">":
+                if line[index + 1:index + 2] == ">":
+                    tokens.append(">>")
+                    index += 1
+                else:
+                    tokens.append(">")
+        else:
+            word += char
+        index += 1
+    if quote:
+        raise ValueError("Unterminated quote")
+    if word or quoted:
+        tokens.append(word)
+    return tokens
+
+def has_operators(tokens):
+    for token in tokens:
+        if token in OPERATORS:
+            return True
+    return False
+
+def parse(tokens):
+    """Return (stages, redirect_path, append) for a tokenized pipeline."""
+    stages = [[]]
+    redirect = None
+    append = False
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token == "|":
+            if not stages[-1]:
+                raise ValueError("Missing command before '|'")
+            stages.append([])
+        elif token in (">", ">>"):
+            if index + 2 != len(tokens) or tokens[index + 1] in OPERATORS:
+                raise ValueError(f"'{token}' must be followed by a single filename at the end of the line")
+            redirect = tokens[index + 1]
+            append = token == ">>"
+            break
+        else:
+            stages[-1].append(token)
+        index += 1
+    if not stages[-1]:
+        raise ValueError("Missing command in pipeline")
+    return stages, redirect, append
+
+def lookup_stage(words):
+    """Return (iterator_function, arguments) for one pipeline stage."""
+    command = words[0].lower()
+    entry = commands.pipe_functions.get(command)
+    arguments = words[1:]
+    if isinstance(entry, dict):
+        command = " ".join(words[:2])
+        entry = entry.get(arguments[0]) if arguments else None
+        arguments = arguments[1:]
+    if entry is None:
+        raise ValueError(f"'{command}' cannot be used in a pipeline")
+    return commands.resolve(entry), arguments
+
+def print_lines(iterator_function, arguments):
+    """Run a pipeline stage as a plain command, printing its lines."""
+    try:
+        for line in iterator_function(arguments):
+            print(line)
+    except Exception as e:
+        error_flash("minor")
+        print(e)
+
+def close_stages(iterators):
+    """Close stage generators so their cleanup runs even when a later stage
+    stopped reading early (head, cat --head). MicroPython does not close an
+    abandoned generator, so a finally block in one would otherwise never run."""
+    for iterator in reversed(iterators):
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+def run(tokens):
+    """Run a pipeline, streaming lines from stage to stage one at a time."""
+    iterators = []
+    try:
+        stages, redirect, append = parse(tokens)
+        lines = None
+        for words in stages:
+            function, arguments = lookup_stage(words)
+            lines = function(arguments, lines)
+            iterators.append(lines)
+    except Exception as e:
+        error_flash("minor")
+        print(e)
+        return
+    try:
+        if redirect is None:
+            for line in lines:
+                print(line)
+        else:
+            with open(redirect, "a" if append else "w") as out:
+                for line in lines:
+                    out.write(line)
+                    out.write("\n")
+            dircache.invalidate(normpath(redirect, shellenv.current_directory))
+    except Exception as e:
+        error_flash("minor")
+        print(f"Pipeline error: {e}")
+    finally:
+        try:
+            close_stages(iterators)
+        except Exception as e:
+            error_flash("minor")
+            print(f"Pipeline error: {e}")
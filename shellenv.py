@@ -0,0 +1,13 @@
+import ledpat
+from devman import get_manager
+
+# State shared by the shell core and every command module. Command modules
+# may be unloaded under memory pressure, so anything that must outlive a
+# command (current directory, device registry) is kept here instead.
+current_directory = "/"
+led_pin = ledpat.start()  # Keeps the pin main.py started the engine with
+devman = get_manager()
+
+def error_flash(severity="minor"):
+    """Queue the LED pattern for an error and return immediately."""
+    ledpat.play(severity if severity in ("minor", "critical") else "default")
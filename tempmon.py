@@ -0,0 +1,145 @@
+import machine
+import time
+from array import array
+
+# RP2040 internal temperature sensor. One ADC instance is shared by the
+# shell, devman and the background monitor; each reading averages
+# OVERSAMPLE conversions with integer math and is kept in centi-degrees,
+# so a history entry fits in one array('h') slot.
+#
+# The monitor samples from a Timer into a fixed ring of readings and checks
+# them against the alarm thresholds; crossing one plays the critical LED
+# pattern and is counted for `temp`.
+TEMP_SENSOR_CHANNEL = 4
+OVERSAMPLE = 16
+NO_ALARM = 32767
+
+# Largest history ring --monitor may allocate (2 bytes per reading, 8 KB)
+HISTORY_MAX = 4096
+
+sensor = None
+
+timer = None
+interval_s = 0
+history = array('h')
+history_head = 0
+history_count = 0
+
+alarm_high = NO_ALARM
+alarm_low = -NO_ALARM
+alarm_count = 0
+alarm_reading = 0
+alarm_ms = 0
+alarm_active = False
+
+def adc():
+    """Return the shared ADC on the temperature sensor channel."""
+    global sensor
+    if sensor is None:
+        sensor = machine.ADC(TEMP_SENSOR_CHANNEL)
+    return sensor
+
+def read_centi(samples=OVERSAMPLE):
+    """Return the temperature in hundredths of a degree C, averaged over samples reads."""
+    read = adc().read_u16
+    total = 0
+    for _ in range(samples):
+        total += read() >> 4  # read_u16 scales the 12-bit result up
+    # 3.3 V reference over 4095 steps, in microvolts
+    microvolts = total * 3300000 // (4095 * samples)
+    # 27 C at 0.706 V, falling 1.721 mV per degree
+    return 2700 - (microvolts - 706000) * 100 // 1721
+
+def format_centi(centi):
+    sign = "-" if centi < 0 else ""
+    centi = abs(centi)
+    return f"{sign}{centi // 100}.{centi % 100:02d}°C"
+
+def check_alarm(centi):
+    global alarm_count, alarm_reading, alarm_ms, alarm_active
+    outside = centi > alarm_high or centi < alarm_low
+    if outside and not alarm_active:
+        alarm_count += 1
+        alarm_reading = centi
+        alarm_ms = time.ticks_ms()
+        import ledpat
+        ledpat.play("critical")
+    alarm_active = outside
+
+def sample(t=None):
+    """Timer callback: record one oversampled reading in the history ring."""
+    global history_head, history_count
+    centi = read_centi()
+    history[history_head] = centi
+    history_head = (history_head + 1) % len(history)
+    if history_count < len(history):
+        history_count += 1
+    check_alarm(centi)
+
+def start(every_s, minutes):
+    """Sample every every_s seconds, keeping the last minutes of readings.
+
+    The new ring is allocated before anything is stopped, so a ValueError
+    or MemoryError leaves the running monitor and its history untouched.
+    """
+    global timer, interval_s, history, history_head, history_count
+    size = max(minutes * 60 // every_s, 1)
+    if size > HISTORY_MAX:
+        raise ValueError(f"{size} readings requested; the history holds at most {HISTORY_MAX} "
+                         f"(use a longer interval or fewer minutes)")
+    ring = array('h', bytearray(2 * size))
+    stop()
+    history = ring
+    history_head = 0
+    history_count = 0
+    interval_s = every_s
+    timer = machine.Timer()
+    timer.init(period=every_s * 1000, mode=machine.Timer.PERIODIC, callback=sample)
+    sample()
+    return size
+
+def stop():
+    """Stop background sampling. The history is kept until the next start."""
+    global timer
+    if timer is not None:
+        timer.deinit()
+        timer = None
+
+def set_alarm(high=None, low=None):
+    """Set alarm thresholds in centi-degrees; None clears that side."""
+    global alarm_high, alarm_low, alarm_active
+    alarm_high = NO_ALARM if high is None else high
+    alarm_low = -NO_ALARM if low is None else low
+    alarm_active = False
+
+def readings():
+    """Yield the history from oldest to newest."""
+    size = len(history)
+    start_index = (history_head - history_count) % size if size else 0
+    for offset in range(history_count):
+        yield history[(start_index + offset) % size]
+
+def summary():
+    """Return (count, min, max, mean, trend per hour) of the history, in centi-degrees.
+
+    The trend is the least-squares slope of the readings against time.
+    """
+    count = history_count
+    if not count:
+        return 0, 0, 0, 0, 0
+    low = NO_ALARM
+    high = -NO_ALARM
+    total = 0
+    weighted = 0
+    for index, centi in enumerate(readings()):
+        low = min(low, centi)
+        high = max(high, centi)
+        total += centi
+        weighted += index * centi
+    mean = total // count
+    if count < 2 or not interval_s:
+        return count, low, high, mean, 0
+    # slope = sum((i - i_mean) * t) / sum((i - i_mean)^2), per sample
+    spread = count * (count * count - 1) // 12
+    slope = (weighted - (count - 1) * total // 2) / spread
+    return count, low, high, mean, int(slope * 3600 / interval_s)
@@ -0,0 +1,181 @@
+# Host companion for the shell's send/recv commands.
+#
+#     python tools/pico_xfer.py <port> put <local file> [device file]
+#     python tools/pico_xfer.py <port> get <device file> [local file]
+#     python tools/pico_xfer.py selftest [size]
+#
+# <port> is the Pico's serial device (e.g. /dev/ttyACM0) with the shell at
+# its prompt. The script types the recv/send command itself, then runs the
+# same xfer.py protocol code as the device. An interrupted transfer is
+# resumed by running the same command again. selftest runs both ends of
+# the protocol in this process over a pty pair.
+#
+# POSIX only (termios); no packages beyond the standard library.
+import os
+import sys
+import time
+import select
+import termios
+import threading
+import tty
+
+script = os.path.abspath(sys.argv[0])
+sys.path.insert(0, os.path.dirname(os.path.dirname(script)))
+import xfer  # noqa: E402
+
+
+class TtyLink:
+    """xfer link over a raw serial or pty file descriptor."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def wait(self, timeout_ms):
+        return bool(select.select([self.fd], [], [], timeout_ms / 1000)[0])
+
+    def readinto(self, buffer):
+        filled = 0
+        while filled < len(buffer):
+            data = os.read(self.fd, len(buffer) - filled)
+            if not data:
+                raise OSError("Serial port closed")
+            buffer[filled:filled + len(data)] = data
+            filled += len(data)
+
+    def write(self, data):
+        data = memoryview(data)
+        while data:
+            data = data[os.write(self.fd, data):]
+
+
+def open_port(path):
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+    tty.setraw(fd)
+    termios.tcflush(fd, termios.TCIOFLUSH)
+    return fd
+
+
+def show_progress(total):
+    started = time.time()
+
+    def progress(offset):
+        rate = offset / max(time.time() - started, 1e-6)
+        sys.stderr.write(f"\r{offset:,}/{total:,} bytes  {rate / 1024:,.1f} KiB/s ")
+    return progress
+
+
+def report(verb, count, resumed, started):
+    elapsed = max(time.time() - started, 1e-6)
+    note = f", resumed at byte {resumed:,}" if resumed else ""
+    print(f"\n{verb} {count:,} bytes in {elapsed:.2f} s ({count / elapsed / 1024:,.1f} KiB/s{note})")
+
+
+def quote(name):
+    return f'"{name}"' if " " in name else name
+
+
+def type_command(link, line):
+    # NUL padding completes any frame a previous, interrupted transfer left
+    # half read; the shell ignores control characters at its prompt
+    link.write(bytes(xfer.HEADER_SIZE + xfer.CHUNK + xfer.CRC_SIZE))
+    link.write(line.encode() + b"\r")
+
+
+def put(port, local, remote):
+    link = TtyLink(open_port(port))
+    type_command(link, f"recv {quote(remote)}")
+    started = time.time()
+    count, resumed = xfer.send(link, local, progress=show_progress(os.path.getsize(local)))
+    report("Sent", count, resumed, started)
+
+
+def get(port, remote, local):
+    link = TtyLink(open_port(port))
+    type_command(link, f"send {quote(remote)}")
+    started = time.time()
+    count, resumed = xfer.receive(link, local, answer=True, progress=lambda offset: sys.stderr.write(f"\r{offset:,} bytes "))
+    report("Received", count, resumed, started)
+
+
+def selftest(size):
+    """Transfer random data both ways over a pty pair, including a resumed transfer."""
+    import tempfile
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    host = TtyLink(master)
+    device = TtyLink(slave)
+    workdir = tempfile.mkdtemp()
+    source = os.path.join(workdir, "source.bin")
+    with open(source, "wb") as f:
+        f.write(os.urandom(size))
+
+    def run_pair(device_side, host_side):
+        errors = []
+
+        def target():
+            try:
+                device_side()
+            except Exception as e:
+                errors.append(e)
+        thread = threading.Thread(target=target)
+        thread.start()
+        started = time.time()
+        result = host_side()
+        thread.join()
+        if errors:
+            raise errors[0]
+        return result, time.time() - started
+
+    def check(path, label, result, elapsed):
+        with open(source, "rb") as a, open(path, "rb") as b:
+            same = a.read() == b.read()
+        count, resumed = result
+        print(f"{label:28} {'ok' if same else 'MISMATCH':8} {count:>10,} bytes  "
+              f"resumed at {resumed:<8,} {count / elapsed / 1024:10,.1f} KiB/s")
+        return same
+
+    ok = True
+    # put: the host sends, the device receives
+    target = os.path.join(workdir, "put.bin")
+    result, elapsed = run_pair(lambda: xfer.receive(device, target), lambda: xfer.send(host, source))
+    ok &= check(target, "put", result, elapsed)
+    # get: the device announces with HELLO, the host answers
+    target = os.path.join(workdir, "get.bin")
+    result, elapsed = run_pair(lambda: xfer.send(device, source, announce=True),
+                               lambda: xfer.receive(host, target, answer=True))
+    ok &= check(target, "get", result, elapsed)
+    # resume: a partial file left by an interrupted put
+    target = os.path.join(workdir, "resume.bin")
+    with open(source, "rb") as f, open(target + xfer.PART_SUFFIX, "wb") as part:
+        part.write(f.read(size // 3))
+    result, elapsed = run_pair(lambda: xfer.receive(device, target), lambda: xfer.send(host, source))
+    ok &= check(target, "resume", result, elapsed)
+    os.close(master)
+    os.close(slave)
+    return ok
+
+
+def main(argv):
+    if len(argv) >= 1 and argv[0] == "selftest":
+        size = int(argv[1]) if len(argv) > 1 else 256 * 1024
+        return 0 if selftest(size) else 1
+    if len(argv) < 3 or argv[1] not in ("put", "get"):
+        print("Usage: pico_xfer.py <port> put <local file> [device file]")
+        print("       pico_xfer.py <port> get <device file> [local file]")
+        print("       pico_xfer.py selftest [size]")
+        return 2
+    port, action, name = argv[0], argv[1], argv[2]
+    try:
+        if action == "put":
+            put(port, name, argv[3] if len(argv) > 3 else os.path.basename(name))
+        else:
+            get(port, name, argv[3] if len(argv) > 3 else os.path.basename(name))
+    except (OSError, RuntimeError) as e:
+        print(f"\nTransfer failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,250 @@
+import _thread
+import time
+from array import array
+
+# Worker on the RP2040's second core. MicroPython can run only one extra
+# thread there, so this single thread serves two kinds of work:
+#   - tasks: one-shot calls (bg commands, ADC captures) run in submission
+#     order; their results stay in the task table until the slot is reused
+#   - periodic jobs: callbacks stepped every period_us (data logging,
+#     waveforms), called with their slot number like a Timer callback
+# Both tables are preallocated and shared with core 0 under one lock. A
+# running task delays periodic jobs until it returns.
+QUEUE_SIZE = 8
+PERIODIC_SLOTS = 4
+
+FREE = 0
+PENDING = 1
+RUNNING = 2
+DONE = 3
+FAILED = 4
+CANCELLED = 5
+STATE_NAMES = ("free", "pending", "running", "done", "failed", "cancelled")
+
+lock = _thread.allocate_lock()
+started = False
+thread_id = None
+next_task_id = 1
+
+task_ids = array('I', [0] * QUEUE_SIZE)
+task_states = bytearray(QUEUE_SIZE)
+task_labels = [None] * QUEUE_SIZE
+task_calls = [None] * QUEUE_SIZE
+task_results = [None] * QUEUE_SIZE
+task_ms = array('I', [0] * QUEUE_SIZE)  # submit time, then run time once finished
+
+periodic_labels = [None] * PERIODIC_SLOTS
+periodic_calls = [None] * PERIODIC_SLOTS
+periodic_us = array('I', [0] * PERIODIC_SLOTS)
+periodic_due = array('I', [0] * PERIODIC_SLOTS)
+periodic_runs = array('I', [0] * PERIODIC_SLOTS)
+periodic_late = array('I', [0] * PERIODIC_SLOTS)
+periodic_errors = [None] * PERIODIC_SLOTS
+active_periodic = -1
+
+def start():
+    """Start the worker thread on core 1 if it is not running yet."""
+    global started
+    if not started:
+        started = True
+        _thread.start_new_thread(run, ())
+
+def on_worker():
+    """True when called from the worker thread itself."""
+    return thread_id is not None and _thread.get_ident() == thread_id
+
+def submit(label, function, arguments=()):
+    """Queue function(*arguments) to run on core 1 and return its task id.
+
+    When the table is full the oldest finished task is dropped; if every
+    slot is still pending or running, RuntimeError is raised.
+    """
+    global next_task_id
+    lock.acquire()
+    try:
+        slot = -1
+        for index in range(QUEUE_SIZE):
+            state = task_states[index]
+            if state == FREE:
+                slot = index
+                break
+            if state >= DONE and (slot < 0 or task_ids[index] < task_ids[slot]):
+                slot = index
+        if slot < 0:
+            raise RuntimeError(f"Worker queue is full ({QUEUE_SIZE} tasks)")
+        task_id = next_task_id
+        next_task_id += 1
+        task_ids[slot] = task_id
+        task_labels[slot] = label
+        task_calls[slot] = (function, arguments)
+        task_results[slot] = None
+        task_ms[slot] = time.ticks_ms()
+        task_states[slot] = PENDING
+    finally:
+        lock.release()
+    start()
+    return task_id
+
+def find_task(task_id):
+    for index in range(QUEUE_SIZE):
+        if task_states[index] != FREE and task_ids[index] == task_id:
+            return index
+    return -1
+
+def cancel(task_id):
+    """Cancel a task that has not started. Returns False otherwise."""
+    lock.acquire()
+    try:
+        slot = find_task(task_id)
+        if slot < 0 or task_states[slot] != PENDING:
+            return False
+        task_states[slot] = CANCELLED
+        task_calls[slot] = None
+        return True
+    finally:
+        lock.release()
+
+def result(task_id):
+    """Return (state name, result) of a task; the result of a failed task is its exception."""
+    lock.acquire()
+    try:
+        slot = find_task(task_id)
+        if slot < 0:
+            raise ValueError(f"No worker task {task_id}")
+        return STATE_NAMES[task_states[slot]], task_results[slot]
+    finally:
+        lock.release()
+
+def tasks():
+    """Return [(id, label, state name, ms)] for every task in the table, oldest first."""
+    lock.acquire()
+    try:
+        now = time.ticks_ms()
+        rows = []
+        for index in range(QUEUE_SIZE):
+            state = task_states[index]
+            if state == FREE:
+                continue
+            ms = task_ms[index] if state >= DONE else time.ticks_diff(now, task_ms[index])
+            rows.append((task_ids[index], task_labels[index], STATE_NAMES[state], ms))
+    finally:
+        lock.release()
+    rows.sort()
+    return rows
+
+def add_periodic(label, function, period_us):
+    """Call function(slot) on core 1 every period_us. Returns the slot."""
+    lock.acquire()
+    try:
+        for slot in range(PERIODIC_SLOTS):
+            if periodic_calls[slot] is None:
+                break
+        else:
+            raise RuntimeError(f"All {PERIODIC_SLOTS} periodic worker slots are in use")
+        periodic_labels[slot] = label
+        periodic_us[slot] = period_us
+        periodic_due[slot] = time.ticks_add(time.ticks_us(), period_us)
+        periodic_runs[slot] = 0
+        periodic_late[slot] = 0
+        periodic_errors[slot] = None
+        periodic_calls[slot] = function
+    finally:
+        lock.release()
+    start()
+    return slot
+
+def remove_periodic(slot):
+    """Stop a periodic job, waiting for a call in progress to return.
+
+    The worker marks a slot active under the lock before calling it, so
+    once the slot is cleared here it is either already active (and waited
+    for) or will be skipped.
+    """
+    lock.acquire()
+    periodic_calls[slot] = None
+    lock.release()
+    while active_periodic == slot:
+        time.sleep_ms(1)
+
+def periodic_jobs():
+    """Return [(slot, label, period_us, runs, late, error)] for active or failed jobs."""
+    rows = []
+    for slot in range(PERIODIC_SLOTS):
+        if periodic_calls[slot] is not None or periodic_errors[slot] is not None:
+            rows.append((slot, periodic_labels[slot], periodic_us[slot], periodic_runs[slot],
+                         periodic_late[slot], periodic_errors[slot]))
+    return rows
+
+def take_task():
+    """Mark the oldest pending task running and return its slot, or -1."""
+    lock.acquire()
+    slot = -1
+    for index in range(QUEUE_SIZE):
+        if task_states[index] == PENDING and (slot < 0 or task_ids[index] < task_ids[slot]):
+            slot = index
+    if slot >= 0:
+        task_states[slot] = RUNNING
+        task_ms[slot] = time.ticks_ms()
+    lock.release()
+    return slot
+
+def run_periodic():
+    """Run the periodic jobs that are due. Returns microseconds until the next one."""
+    global active_periodic
+    wait = 2000
+    for slot in range(PERIODIC_SLOTS):
+        function = periodic_calls[slot]
+        if function is None:
+            continue
+        now = time.ticks_us()
+        due = periodic_due[slot]
+        if time.ticks_diff(now, due) >= 0:
+            lock.acquire()
+            function = periodic_calls[slot]
+            if function is not None:
+                active_periodic = slot
+            lock.release()
+            if function is None:
+                continue
+            try:
+                function(slot)
+            except Exception as e:
+                lock.acquire()
+                periodic_calls[slot] = None
+                periodic_errors[slot] = e
+                lock.release()
+            active_periodic = -1
+            periodic_runs[slot] += 1
+            due = time.ticks_add(due, periodic_us[slot])
+            if time.ticks_diff(now, due) >= 0:
+                # Fell a whole period behind: count it and resynchronise
+                periodic_late[slot] += 1
+                due = time.ticks_add(now, periodic_us[slot])
+            periodic_due[slot] = due
+        wait = min(wait, time.ticks_diff(due, now))
+    return wait
+
+def run():
+    """Worker loop, running on core 1."""
+    global thread_id
+    thread_id = _thread.get_ident()
+    while True:
+        wait = run_periodic()
+        slot = take_task()
+        if slot >= 0:
+            function, arguments = task_calls[slot]
+            start_ms = task_ms[slot]
+            try:
+                value = function(*arguments)
+                state = DONE
+            except Exception as e:
+                value = e
+                state = FAILED
+            lock.acquire()
+            task_results[slot] = value
+            task_calls[slot] = None
+            task_ms[slot] = time.ticks_diff(time.ticks_ms(), start_ms)
+            task_states[slot] = state
+            lock.release()
+        elif wait > 0:
+            time.sleep_us(min(wait, 1000))
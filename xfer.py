@@ -0,0 +1,274 @@
+import struct
+import binascii
+try:
+    import uos as os
+except ImportError:
+    import os
+
+# Framed binary file transfer, shared by the send/recv commands on the
+# device and tools/pico_xfer.py on the host, so both ends run the same code.
+#
+# Every frame is a HEADER (magic, kind, seq, offset, length), up to CHUNK
+# bytes of payload and the CRC32 of both. The receiver opens the session
+# with READY carrying the offset to start from: data goes to <file>.part,
+# so an interrupted transfer resumes where the partial file ends. The
+# sender keeps up to WINDOW frames in flight; the receiver acknowledges
+# each frame with the next offset it expects (ACK) or asks for a rewind
+# (NAK). END carries the CRC32 of the whole file, and the receiver only
+# renames the partial file once that matches.
+#
+# A link is any object with wait(timeout_ms) -> bool, readinto(buffer)
+# (blocking until the buffer is full) and write(data).
+HEADER = "<BBHIH"
+HEADER_SIZE = 10
+CRC_SIZE = 4
+CHUNK = 1024
+WINDOW = 8
+MAGIC = 0xA5
+
+DATA = 1
+ACK = 2
+NAK = 3
+READY = 4
+END = 5
+ABORT = 6
+HELLO = 7
+
+RETRY_MS = 1000
+RETRIES = 10
+IDLE_TIMEOUT_MS = 10000
+LINGER_MS = 500
+
+PART_SUFFIX = ".part"
+
+class Framer:
+    """Reads and writes frames through one reused buffer per direction."""
+
+    def __init__(self, link):
+        self.link = link
+        self.incoming = bytearray(HEADER_SIZE + CHUNK + CRC_SIZE)
+        self.outgoing = bytearray(HEADER_SIZE + CHUNK + CRC_SIZE)
+        self.incoming_view = memoryview(self.incoming)
+        self.outgoing_view = memoryview(self.outgoing)
+        self.seq = 0
+        self.bad = 0
+
+    def payload(self):
+        """Writable view of the outgoing payload area, for readinto()."""
+        return self.outgoing_view[HEADER_SIZE:HEADER_SIZE + CHUNK]
+
+    def write(self, kind, offset, length=0, payload=None):
+        """Send a frame. payload is copied in unless it was read into payload() already."""
+        view = self.outgoing_view
+        if payload:
+            length = len(payload)
+            view[HEADER_SIZE:HEADER_SIZE + length] = payload
+        struct.pack_into(HEADER, view, 0, MAGIC, kind, self.seq, offset, length)
+        self.seq = (self.seq + 1) & 0xFFFF
+        end = HEADER_SIZE + length
+        struct.pack_into("<I", view, end, binascii.crc32(view[:end]) & 0xFFFFFFFF)
+        self.link.write(view[:end + CRC_SIZE])
+
+    def read(self, timeout_ms):
+        """Return (kind, offset, length) of the next good frame, or None on timeout.
+
+        Bytes before the magic (shell echo, line noise) are skipped and a
+        frame whose CRC fails is counted in self.bad and returned as kind 0.
+        """
+        view = self.incoming_view
+        while True:
+            if not self.link.wait(timeout_ms):
+                return None
+            self.link.readinto(view[:1])
+            if view[0] == MAGIC:
+                break
+        self.link.readinto(view[1:HEADER_SIZE])
+        magic, kind, seq, offset, length = struct.unpack_from(HEADER, view, 0)
+        if length > CHUNK:
+            self.bad += 1
+            return 0, 0, 0
+        end = HEADER_SIZE + length
+        self.link.readinto(view[HEADER_SIZE:end + CRC_SIZE])
+        if struct.unpack_from("<I", view, end)[0] != binascii.crc32(view[:end]) & 0xFFFFFFFF:
+            self.bad += 1
+            return 0, 0, 0
+        return kind, offset, length
+
+    def received(self, length):
+        """View of the payload of the last frame read."""
+        return self.incoming_view[HEADER_SIZE:HEADER_SIZE + length]
+
+    def abort(self, message):
+        self.write(ABORT, 0, payload=message.encode()[:CHUNK])
+
+def file_crc(file, buffer):
+    """CRC32 of a file from its current position to the end."""
+    crc = 0
+    while True:
+        count = file.readinto(buffer)
+        if not count:
+            return crc
+        crc = binascii.crc32(buffer[:count] if count < len(buffer) else buffer, crc)
+
+def file_size(path):
+    try:
+        return os.stat(path)[6]
+    except OSError:
+        return -1
+
+def receive(link, path, answer=False, progress=None):
+    """Receive a file into path. Returns (bytes received this session, resumed from).
+
+    READY is repeated until data arrives; with answer it is only sent in
+    reply to the sender's HELLO. Raises RuntimeError if the sender aborts
+    or goes quiet; the partial file is kept so that the next transfer
+    resumes from it.
+    """
+    framer = Framer(link)
+    part_path = path + PART_SUFFIX
+    resumed = max(file_size(part_path), 0)
+    crc = 0
+    with open(part_path, "ab") as out:
+        if resumed:
+            with open(part_path, "rb") as existing:
+                crc = file_crc(existing, framer.payload())
+        expected = resumed
+        nak_offset = -1
+        started = False
+        quiet_ms = 0
+        while True:
+            if not started and not answer:
+                framer.write(READY, expected)
+            frame = framer.read(RETRY_MS)
+            if frame is None:
+                quiet_ms += RETRY_MS
+                if quiet_ms >= IDLE_TIMEOUT_MS:
+                    raise RuntimeError(f"Sender went quiet at offset {expected}; run it again to resume")
+                continue
+            quiet_ms = 0
+            kind, offset, length = frame
+            if kind == DATA:
+                started = True
+                if offset == expected:
+                    payload = framer.received(length)
+                    out.write(payload)
+                    crc = binascii.crc32(payload, crc)
+                    expected += length
+                    nak_offset = -1
+                    framer.write(ACK, expected)
+                    if progress:
+                        progress(expected)
+                elif offset < expected:
+                    framer.write(ACK, expected)  # Duplicate after a rewind
+                elif nak_offset != expected:
+                    nak_offset = expected
+                    framer.write(NAK, expected)
+            elif kind == 0:
+                if started and nak_offset != expected:
+                    nak_offset = expected
+                    framer.write(NAK, expected)
+            elif kind == END:
+                started = True
+                if offset != expected:
+                    framer.write(NAK, expected)
+                    continue
+                if struct.unpack_from("<I", framer.received(length), 0)[0] != crc & 0xFFFFFFFF:
+                    out.close()
+                    os.remove(part_path)
+                    framer.abort("CRC mismatch")
+                    raise RuntimeError("File CRC mismatch; partial file discarded")
+                break
+            elif kind == HELLO:
+                if answer and not started:
+                    framer.write(READY, expected)
+            elif kind == ABORT:
+                raise RuntimeError(f"Sender aborted: {bytes(framer.received(length)).decode()}")
+    if file_size(path) >= 0:
+        os.remove(path)
+    os.rename(part_path, path)
+    framer.write(END, expected)
+    # Answer a repeated END in case the confirmation was lost
+    while True:
+        frame = framer.read(LINGER_MS)
+        if frame is None:
+            break
+        if frame[0] == END:
+            framer.write(END, expected)
+    return expected - resumed, resumed
+
+def send(link, path, announce=False, progress=None):
+    """Send path to a receiver. Returns (bytes sent this session, resumed from).
+
+    With announce, HELLO is repeated until the receiver answers; the device
+    uses it so the host never types into the shell before recv/send runs.
+    """
+    framer = Framer(link)
+    size = file_size(path)
+    if size < 0:
+        raise OSError(f"No such file: '{path}'")
+    with open(path, "rb") as source:
+        buffer = framer.payload()
+        # END carries the CRC of the whole file, resumed part included
+        crc = file_crc(source, buffer)
+        # Wait for the receiver to say where to start
+        start = -1
+        for _ in range(IDLE_TIMEOUT_MS // RETRY_MS):
+            if announce:
+                framer.write(HELLO, size)
+            frame = framer.read(RETRY_MS)
+            if frame is not None and frame[0] == READY:
+                start = frame[1]
+                break
+            if frame is not None and frame[0] == ABORT:
+                raise RuntimeError(f"Receiver aborted: {bytes(framer.received(frame[2])).decode()}")
+        if start < 0:
+            raise RuntimeError("No receiver answered")
+        if start > size:
+            framer.abort("Partial file is larger than the source")
+            raise RuntimeError(f"Receiver already has {start} bytes of a {size}-byte file")
+        source.seek(start)
+        acked = start
+        sent = start
+        retries = 0
+        waited_ms = 0
+        while acked < size:
+            while sent < size and sent - acked < WINDOW * CHUNK:
+                count = source.readinto(buffer)
+                framer.write(DATA, sent, count)
+                sent += count
+            frame = framer.read(50)
+            if frame is None:
+                waited_ms += 50
+                if waited_ms < RETRY_MS:
+                    continue
+                retries += 1
+                if retries > RETRIES:
+                    framer.abort("Too many retries")
+                    raise RuntimeError(f"No acknowledgement after {RETRIES} retries at offset {acked}")
+                frame = (NAK, acked, 0)  # Nothing heard: go back to the last ACK
+            waited_ms = 0
+            kind, offset, length = frame
+            if kind == ACK and offset > acked:
+                acked = offset
+                retries = 0
+                if progress:
+                    progress(acked)
+            elif kind == NAK and acked <= offset <= sent:
+                acked = offset
+                sent = offset
+                source.seek(offset)
+            elif kind == ABORT:
+                raise RuntimeError(f"Receiver aborted: {bytes(framer.received(length)).decode()}")
+    trailer = struct.pack("<I", crc & 0xFFFFFFFF)
+    for _ in range(RETRIES):
+        framer.write(END, size, payload=trailer)
+        # The receiver echoes END once the file is complete and renamed
+        while True:
+            frame = framer.read(RETRY_MS)
+            if frame is None:
+                break
+            if frame[0] == END:
+                return size - start, start
+            if frame[0] == ABORT:
+                raise RuntimeError(f"Receiver aborted: {bytes(framer.received(frame[2])).decode()}")
+    raise RuntimeError("Receiver did not confirm the end of the file")